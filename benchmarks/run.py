@@ -0,0 +1,141 @@
+"""
+Замеры производительности блога на сгенерированных данных.
+
+    python benchmarks/run.py --users 100000 --posts 1000000
+        --comments 10000000 --output results.json
+    python benchmarks/run.py --compare results.json
+
+Данные создаются один раз в отдельной базе (--database)
+и переиспользуются следующими запусками; --reseed создаёт их заново.
+Результат — JSON с перцентилями времени ответа и числом запросов
+к базе по каждому сценарию; --compare печатает разницу с прошлым
+результатом, например с замером предыдущего коммита.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import django
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DATABASE = ROOT / 'benchmarks' / 'bench.sqlite3'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--database', type=Path, default=DEFAULT_DATABASE)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--comments', type=int, default=100000)
+    parser.add_argument(
+        '--hot-comments', type=int, default=2000,
+        help='Комментариев у поста для сценария post_detail.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--reseed', action='store_true')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument(
+        '--scenario', action='append',
+        help='Замерить только этот сценарий (можно несколько раз).')
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--compare', type=Path)
+    return parser.parse_args()
+
+
+def setup(database):
+    """Настройка Django на базу для замеров, без отладочных надстроек."""
+    sys.path[:0] = [str(ROOT), str(ROOT / 'blogicum')]
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+    # Шаблоны — как в продакшене: разобраны один раз и закэшированы.
+    os.environ.setdefault('BLOGICUM_TEMPLATE_CACHE', '1')
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = database
+    django.setup()
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    settings.QUERY_BUDGET = {**settings.QUERY_BUDGET, 'ENABLED': False}
+    logging.getLogger('blog.timing').setLevel(logging.WARNING)
+
+
+def prepare(args):
+    from django.core.management import call_command
+
+    from blog.models import Post
+
+    if args.reseed and args.database.exists():
+        args.database.unlink()
+    call_command('migrate', verbosity=0)
+    if not Post.objects.exists():
+        call_command(
+            'generate_blog_data',
+            users=args.users, posts=args.posts, comments=args.comments,
+            hot_comments=args.hot_comments, seed=args.seed,
+            batch_size=args.batch_size, stdout=sys.stderr)
+
+
+def get_meta():
+    from django.contrib.auth import get_user_model
+
+    from blog.models import Comment, Post
+
+    commit = subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'],
+        cwd=ROOT, capture_output=True, text=True,
+    ).stdout.strip()
+    return {
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'users': get_user_model().objects.count(),
+        'posts': Post.objects.count(),
+        'comments': Comment.objects.count(),
+    }
+
+
+def compare(previous, results):
+    """Таблица изменений p50, p99 и числа запросов."""
+    lines = [f'{"сценарий":<20}{"p50, мс":>18}{"p99, мс":>18}{"запросы":>12}']
+    for name, current in results.items():
+        old = previous['results'].get(name)
+        if old is None:
+            continue
+        lines.append(
+            f'{name:<20}'
+            f'{old["p50_ms"]:>8} → {current["p50_ms"]:<7}'
+            f'{old["p99_ms"]:>8} → {current["p99_ms"]:<7}'
+            f'{old["queries"]:>5} → {current["queries"]:<4}'
+        )
+    return '\n'.join(lines)
+
+
+def main():
+    args = parse_args()
+    setup(args.database)
+    prepare(args)
+
+    from benchmarks.scenarios import run
+
+    report = {
+        'meta': get_meta(),
+        'results': run(args.repeat, names=args.scenario),
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        args.output.write_text(output + '\n', encoding='utf-8')
+    else:
+        print(output)
+    if args.compare:
+        previous = json.loads(args.compare.read_text(encoding='utf-8'))
+        print(compare(previous, report['results']), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import statistics
+import time
+from contextlib import ExitStack
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.middleware import QueryCollector
+from blog.mixins import FROM_NEW_TO_OLD, PAGINATOR_QUANTITY
+from blog.models import Post
+from blog.paginators import encode_cursor
+
+User = get_user_model()
+
+
+def get_scenarios():
+    """
+    Сценарии замеров: имя -> (метод, URL, данные формы).
+    Глубокие страницы — середина главной ленты по номеру страницы
+    (OFFSET) и по курсору.
+    """
+    visible = Post.objects.filter(
+        is_published=True,
+        pub_date__lte=timezone.now(),
+        category__is_published=True,
+    ).order_by(*FROM_NEW_TO_OLD)
+    total = visible.count()
+    middle = visible[total // 2]
+    hot = Post.objects.order_by('-comment_count', 'pk').first()
+    author = User.objects.annotate(
+        total=Count('posts')).order_by('-total').first()
+    index = reverse('blog:index')
+    return {
+        'index': ('get', index, None),
+        'index_deep_page': (
+            'get',
+            f'{index}?page={max(total // PAGINATOR_QUANTITY // 2, 1)}',
+            None),
+        'index_deep_cursor': (
+            'get',
+            f'{index}?after={encode_cursor([middle.pub_date, middle.pk])}',
+            None),
+        'category_posts': (
+            'get',
+            reverse('blog:category_posts', args=(hot.category.slug,)),
+            None),
+        'profile': (
+            'get', reverse('blog:profile', args=(author.username,)), None),
+        'post_detail': (
+            'get', reverse('blog:post_detail', args=(hot.pk,)), None),
+        'add_comment': (
+            'post', reverse('blog:add_comment', args=(hot.pk,)),
+            {'text': 'Комментарий для замера.'}),
+    }
+
+
+def percentile(cuts, value):
+    return round(cuts[value - 1] * 1000, 2)
+
+
+def summarize(durations, queries):
+    """Перцентили времени ответа в миллисекундах и число запросов."""
+    cuts = (
+        statistics.quantiles(durations, n=100, method='inclusive')
+        if len(durations) > 1 else durations * 99
+    )
+    return {
+        'requests': len(durations),
+        'mean_ms': round(statistics.mean(durations) * 1000, 2),
+        'p50_ms': percentile(cuts, 50),
+        'p90_ms': percentile(cuts, 90),
+        'p99_ms': percentile(cuts, 99),
+        'max_ms': round(max(durations) * 1000, 2),
+        'queries': max(queries),
+    }
+
+
+def measure(client, method, url, data, repeat):
+    durations, queries = [], []
+    for _ in range(repeat):
+        collector = QueryCollector()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(collector))
+            start = time.perf_counter()
+            response = getattr(client, method)(url, data or {})
+            durations.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{url}: ответ {response.status_code}')
+        queries.append(collector.count)
+    return summarize(durations, queries)
+
+
+def run(repeat, warmup=2, names=None):
+    """
+    Замеры всех сценариев (или только names) от имени
+    вошедшего пользователя: страницы для анонимов кэшируются целиком
+    и замерялся бы кэш.
+    """
+    client = Client()
+    client.force_login(User.objects.order_by('pk').first())
+    results = {}
+    for name, (method, url, data) in get_scenarios().items():
+        if names and name not in names:
+            continue
+        for _ in range(warmup):
+            getattr(client, method)(url, data or {})
+        results[name] = {
+            'url': url, **measure(client, method, url, data, repeat)}
+    return results
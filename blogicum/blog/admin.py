@@ -1,7 +1,8 @@
 from django.contrib import admin
-from .models import Category, Post, Location
+from .models import Category, Job, Post, Location
 
 
 admin.site.register(Category)
 admin.site.register(Post)
 admin.site.register(Location)
+admin.site.register(Job)
@@ -0,0 +1,197 @@
+import math
+import random
+import time
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .routers import reads_from_replica
+
+# Время жизни закэшированной страницы ленты, секунд.
+FEED_PAGE_TIMEOUT = 60 * 5
+
+# Ключ версии, общей для всех страниц лент.
+FEED_VERSION_KEY = 'version:feed'
+# Время последней смены версии лент.
+FEED_CHANGED_KEY = 'version:feed:changed_at'
+# Ключ версии, общей для всех пользователей: имена выводятся
+# в комментариях, а под какими постами они, без запроса не узнать.
+USERS_VERSION_KEY = 'version:users'
+
+# Сколько секунд пересчёт значения может держать блокировку.
+LOCK_TIMEOUT = 10
+# Как часто ожидающие пересчёта проверяют, готово ли значение.
+LOCK_POLL_INTERVAL = 0.05
+
+
+def version_key(instance):
+    """Ключ версии объекта в кэше."""
+    return f'version:{instance._meta.label_lower}:{instance.pk}'
+
+
+def _bump(key):
+    cache.set(key, uuid4().hex, None)
+
+
+def _get_versions(keys):
+    """
+    Отсутствующая версия создаётся заново, а не считается нулевой,
+    чтобы после вытеснения из кэша не ожили старые записи.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return ':'.join(versions[key] for key in keys)
+
+
+def bump_version(instance):
+    """
+    Сброс закэшированных фрагментов, построенных по объекту:
+    новая случайная версия меняет их ключи.
+    """
+    _bump(version_key(instance))
+
+
+def get_versions(*instances):
+    """Общая версия для набора объектов (None пропускаются)."""
+    return _get_versions(
+        [version_key(obj) for obj in instances if obj is not None])
+
+
+def bump_users_version():
+    """Сброс страниц, где выводятся пользователи (страницы постов)."""
+    _bump(USERS_VERSION_KEY)
+
+
+def get_users_version():
+    """Версия, общая для всех пользователей."""
+    return _get_versions([USERS_VERSION_KEY])
+
+
+def bump_feed_version():
+    """Сброс всех закэшированных страниц лент."""
+    version = uuid4().hex
+    cache.set_many({
+        FEED_VERSION_KEY: version,
+        FEED_CHANGED_KEY: (version, timezone.now()),
+    }, None)
+
+
+def get_feed_version():
+    """
+    Версия лент и время её смены. Время неизвестно (None),
+    если запись вытеснили из кэша или версия создана заново.
+    """
+    version = _get_versions([FEED_VERSION_KEY])
+    changed = cache.get(FEED_CHANGED_KEY)
+    if changed is None or changed[0] != version:
+        return version, None
+    return version, changed[1]
+
+
+def read_source():
+    """
+    Откуда читает текущий запрос. Входит в ключи всего, что кэшируется
+    по прочитанным данным: отстающая реплика иначе заполнила бы
+    старыми данными записи под уже новой версией, и их получили бы
+    клиенты, читающие после записи с основной базы.
+    """
+    return 'replica' if reads_from_replica() else 'default'
+
+
+def _feed_prefix():
+    return f'feed:{read_source()}:{_get_versions([FEED_VERSION_KEY])}'
+
+
+def feed_page_key(path):
+    """Ключ закэшированной страницы ленты."""
+    return f'{_feed_prefix()}:{path}'
+
+
+def feed_count_key(name):
+    """Ключ закэшированного числа постов в ленте."""
+    return f'{_feed_prefix()}:count:{name}'
+
+
+def feed_last_published_key(name):
+    """Ключ закэшированного времени последней публикации в ленте."""
+    return f'{_feed_prefix()}:last_published:{name}'
+
+
+def feed_page_timeout():
+    """
+    Время жизни страницы ленты: не дольше FEED_PAGE_TIMEOUT
+    и не дольше момента ближайшей отложенной публикации,
+    иначе она появится в ленте с опозданием.
+    """
+    from .models import FeedEntry
+
+    key = f'{_feed_prefix()}:next_publication'
+    now = timezone.now()
+    next_publication = cache.get(key)
+    if next_publication is None or (
+            next_publication and next_publication <= now):
+        next_publication = FeedEntry.objects.filter(
+            pub_date__gt=now
+        ).order_by('pub_date').values_list('pub_date', flat=True).first()
+        # False — отложенных публикаций нет.
+        cache.set(key, next_publication or False, (
+            (next_publication - now).total_seconds()
+            if next_publication else FEED_PAGE_TIMEOUT))
+    if not next_publication:
+        return FEED_PAGE_TIMEOUT
+    return min(FEED_PAGE_TIMEOUT, (next_publication - now).total_seconds())
+
+
+def get_or_compute(key, compute, timeout, beta=1.0,
+                   lock_timeout=LOCK_TIMEOUT, cacheable=None):
+    """
+    Значение из кэша или результат compute() без «лавины» пересчётов.
+    Значение пересчитывается заранее, с вероятностью, растущей
+    к концу срока жизни (probabilistic early expiration),
+    и только одним процессом — под блокировкой в самом кэше.
+    Остальные тем временем получают прежнее значение,
+    а если его ещё нет — ждут, пока пересчёт закончится
+    или блокировка освободится (тогда пересчитывают сами).
+    timeout может быть функцией: тогда он вычисляется при сохранении.
+    Если cacheable(value) ложно, значение не сохраняется.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires_at, delta = entry
+        if time.time() - delta * beta * math.log(
+                1 - random.random()) < expires_at:
+            return value
+    lock_key = f'{key}:lock'
+    token = uuid4().hex
+    locked = cache.add(lock_key, token, lock_timeout)
+    if not locked and entry is not None:
+        return entry[0]
+    deadline = time.time() + lock_timeout
+    while not locked and time.time() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        # Держатель блокировки мог упасть, не сохранив значение.
+        locked = cache.add(lock_key, token, lock_timeout)
+    try:
+        start = time.time()
+        value = compute()
+        delta = time.time() - start
+        if cacheable is None or cacheable(value):
+            if callable(timeout):
+                timeout = timeout()
+            # Запись живёт вдвое дольше срока, чтобы во время пересчёта
+            # остальным было что отдать.
+            cache.set(
+                key, (value, time.time() + timeout, delta), timeout * 2)
+    finally:
+        # Снимаем только свою блокировку: чужую, взятую после истечения
+        # нашей, не трогаем.
+        if locked and cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    return value
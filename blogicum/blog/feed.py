@@ -0,0 +1,77 @@
+from django.db import transaction
+from django.db.models import Q
+
+from .models import FeedEntry, Post
+
+# Пост попадает в ленту, если он и его категория опубликованы.
+# Время публикации проверяется при чтении ленты.
+IN_FEED = Q(is_published=True, category__is_published=True)
+
+# Поля поста, которые копируются в ленту.
+FEED_FIELDS = ('category_id', 'author_id', 'pub_date')
+
+
+def make_entry(values):
+    post_id, *fields = values
+    return FeedEntry(post_id=post_id, **dict(zip(FEED_FIELDS, fields)))
+
+
+def sync_post(post, created=False):
+    """
+    Добавление, обновление или удаление записи ленты для поста.
+    Значения берутся из базы: попадание в ленту зависит
+    и от категории поста. У нового поста записи ещё нет.
+    """
+    values = Post.objects.filter(IN_FEED, pk=post.pk).values_list(
+        'pk', *FEED_FIELDS).first()
+    if created:
+        if values is not None:
+            make_entry(values).save(force_insert=True)
+        return
+    with transaction.atomic(savepoint=False):
+        FeedEntry.objects.filter(post_id=post.pk).delete()
+        if values is not None:
+            make_entry(values).save(force_insert=True)
+
+
+def sync_category(category, batch_size=1000):
+    """
+    Снятие категории с публикации убирает её посты из ленты,
+    публикация — добавляет. Остальные изменения ленту не трогают.
+    """
+    entries = FeedEntry.objects.filter(category=category)
+    if not category.is_published:
+        entries.delete()
+    elif not entries.exists():
+        FeedEntry.objects.bulk_create(
+            map(make_entry, Post.objects.filter(
+                IN_FEED, category=category
+            ).values_list('pk', *FEED_FIELDS).iterator()),
+            batch_size=batch_size,
+        )
+
+
+def rebuild(batch_size):
+    """
+    Пересборка ленты по диапазонам pk: записи диапазона удаляются
+    и создаются заново в одной транзакции, поэтому лента
+    не пустеет на время пересборки. Возвращает число записей.
+    """
+    last = Post.objects.order_by('-pk').values_list(
+        'pk', flat=True).first() or 0
+    total = 0
+    for start in range(0, last, batch_size):
+        end = start + batch_size
+        with transaction.atomic():
+            FeedEntry.objects.filter(
+                post_id__gt=start, post_id__lte=end).delete()
+            entries = FeedEntry.objects.bulk_create(map(
+                make_entry,
+                Post.objects.filter(
+                    IN_FEED, pk__gt=start, pk__lte=end
+                ).values_list('pk', *FEED_FIELDS),
+            ))
+        total += len(entries)
+    # Записи постов, удалённых во время пересборки.
+    FeedEntry.objects.filter(post_id__gt=last).delete()
+    return total
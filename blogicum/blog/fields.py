@@ -0,0 +1,22 @@
+from django.db import models
+
+
+class SearchDocumentField(models.TextField):
+    """
+    Скрытый столбец таблицы FTS5 с её же именем:
+    условие MATCH по нему ищет во всех столбцах таблицы.
+    """
+
+    pass
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    """Поиск FTS5: document__match='запрос'."""
+
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
@@ -1,14 +1,42 @@
 from django import forms
 
 from .models import Post, User, Comment
+from .uploads import check_image_upload, file_too_large
+
+
+class PostImageField(forms.ImageField):
+    """
+    Поле изображения поста: размер файла и размеры изображения
+    проверяются до того, как файл откроет стандартная проверка.
+    """
+
+    def to_python(self, data):
+        if data not in self.empty_values:
+            check_image_upload(data)
+        return super().to_python(data)
 
 
 class PostForm(forms.ModelForm):
-    """Форма для поста."""
+    """
+    Форма для поста.
+    oversized_uploads — поля, загрузку в которые прервал
+    LimitedUploadHandler: файла в форме нет, но это ошибка.
+    """
+
+    def __init__(self, *args, oversized_uploads=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.oversized_uploads = oversized_uploads
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field in self.oversized_uploads:
+            self.add_error(field, file_too_large())
+        return cleaned_data
 
     class Meta:
         model = Post
         exclude = ('author', 'is_published')
+        field_classes = {'image': PostImageField}
         widgets = {
             'pub_date': forms.DateTimeInput(
                 format='%Y-%m-%dT%H:%M', attrs={
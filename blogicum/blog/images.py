@@ -0,0 +1,63 @@
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Варианты изображения поста: имя и ширина в пикселях.
+RENDITIONS = {
+    'card': 640,
+    'detail': 1280,
+}
+
+# Форматы вариантов: расширение, формат Pillow и параметры сохранения.
+RENDITION_FORMATS = {
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+}
+
+
+def rendition_name(name, rendition, extension):
+    """
+    Имя файла варианта рядом с оригиналом:
+    posts/ab/cd/abcd….jpg -> posts/ab/cd/abcd….card.webp.
+    """
+    path = PurePosixPath(name)
+    return str(path.with_name(f'{path.stem}.{rendition}.{extension}'))
+
+
+def rendition_names(name):
+    """Имена всех вариантов изображения."""
+    return [
+        rendition_name(name, rendition, extension)
+        for rendition in RENDITIONS
+        for extension in RENDITION_FORMATS
+    ]
+
+
+def has_renditions(image):
+    return image.storage.exists(
+        rendition_name(image.name, next(iter(RENDITIONS)), 'jpg'))
+
+
+def generate_renditions(image):
+    """
+    Создание уменьшенных копий изображения в JPEG и WebP.
+    Ориентация из EXIF применяется к пикселям,
+    сами метаданные в копии не попадают.
+    """
+    storage = image.storage
+    with storage.open(image.name) as original:
+        source = ImageOps.exif_transpose(Image.open(original))
+        source = source.convert('RGB')
+    for rendition, width in RENDITIONS.items():
+        resized = source.copy()
+        resized.thumbnail((width, width * 4), Image.Resampling.LANCZOS)
+        for extension, (image_format, options) in RENDITION_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, image_format, **options)
+            # Хранилище заменяет файл атомарно: готовая копия
+            # доступна, пока пишется новая.
+            storage.save(
+                rendition_name(image.name, rendition, extension),
+                ContentFile(buffer.getvalue()))
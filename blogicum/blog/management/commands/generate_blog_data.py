@@ -0,0 +1,187 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog import feed
+from blog.models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+# Словарь для заголовков и текстов: по ним работает и поиск.
+WORDS = (
+    'байкал', 'горы', 'море', 'город', 'лес', 'река', 'поезд', 'зима',
+    'лето', 'осень', 'весна', 'пирог', 'кофе', 'книга', 'кино', 'музыка',
+    'спорт', 'бег', 'велосипед', 'фото', 'камера', 'дорога', 'дом',
+    'сад', 'кот', 'собака', 'работа', 'код', 'python', 'django',
+)
+# Доля неопубликованных постов и постов с отложенной публикацией.
+UNPUBLISHED = 0.05
+DELAYED = 0.01
+# За сколько дней в прошлое распределены даты публикации.
+DAYS = 3650
+# Каждая десятая категория снята с публикации.
+UNPUBLISHED_CATEGORY_EVERY = 10
+# Размер пачки по умолчанию.
+BATCH_SIZE = 5000
+
+
+def in_batches(total, batch_size):
+    """Размеры пачек, на которые делится total."""
+    for start in range(0, total, batch_size):
+        yield min(batch_size, total - start)
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт пользователей, категории, места, посты и комментарии'
+        ' для нагрузочных замеров. Данные добавляются к существующим.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--locations', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--hot-comments', type=int, default=0,
+            help='Сколько комментариев добавить одному посту из ленты.')
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Одинаковый seed на пустой базе даёт одинаковые данные.')
+        parser.add_argument(
+            '--now', type=self.parse_now, default=None,
+            help='Момент в ISO 8601, от которого отсчитываются даты'
+                 ' публикаций (по умолчанию — текущий). С --seed'
+                 ' даёт и одинаковые даты.')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько строк создавать за одну транзакцию.')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = options['now'] or timezone.now()
+        self.create_users(options['users'])
+        self.create_places(options['categories'], options['locations'])
+        self.create_posts(options['posts'])
+        self.create_comments(options['comments'], options['hot_comments'])
+        # bulk_create не вызывает сигналы: счётчики комментариев
+        # считаются отдельно, поисковый индекс заполняют триггеры.
+        self.update_comment_counts()
+        # bulk_create не отправляет сигналы, поддерживающие ленту.
+        feed.rebuild(self.batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {options["users"]},'
+            f' постов {options["posts"]},'
+            f' комментариев {options["comments"] + options["hot_comments"]}.'
+        ))
+
+    @staticmethod
+    def parse_now(value):
+        now = parse_datetime(value)
+        if now is None:
+            raise CommandError(f'Неверная дата --now: {value}.')
+        if timezone.is_naive(now):
+            now = timezone.make_aware(now)
+        return now
+
+    def sentence(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words)).capitalize()
+
+    def create(self, model, total, make):
+        """
+        Создание total объектов пачками, каждая в своей транзакции.
+        make получает номер объекта от 0 до total - 1.
+        """
+        created = 0
+        for size in in_batches(total, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    make(number) for number in range(created, created + size))
+            created += size
+
+    def create_users(self, total):
+        start = User.objects.count()
+        self.create(User, total, lambda number: User(
+            username=f'user{start + number}', password='!'))
+
+    def create_places(self, categories, locations):
+        start = Category.objects.count()
+        self.create(Category, categories, lambda number: Category(
+            title=self.sentence(2),
+            description=self.sentence(10),
+            slug=f'category-{start + number}',
+            is_published=(
+                number % UNPUBLISHED_CATEGORY_EVERY
+                != UNPUBLISHED_CATEGORY_EVERY - 1),
+        ))
+        self.create(Location, locations, lambda number: Location(
+            name=self.sentence(1)))
+
+    def make_post(self, authors, categories, locations):
+        chance = self.rng.random()
+        if chance < DELAYED:
+            delay = self.rng.uniform(1, 30)
+        else:
+            delay = -self.rng.uniform(0, DAYS)
+        return Post(
+            title=self.sentence(3),
+            text=self.sentence(40),
+            pub_date=self.now + timedelta(days=delay),
+            is_published=not DELAYED <= chance < DELAYED + UNPUBLISHED,
+            author_id=self.rng.choice(authors),
+            category_id=self.rng.choice(categories),
+            location_id=self.rng.choice(locations),
+        )
+
+    def create_posts(self, total):
+        authors = list(User.objects.values_list('pk', flat=True))
+        categories = list(Category.objects.values_list('pk', flat=True))
+        locations = list(Location.objects.values_list('pk', flat=True))
+        self.create(Post, total, lambda number: self.make_post(
+            authors, categories, locations))
+
+    def get_hot_post(self):
+        """Пост из главной ленты для комментариев --hot-comments."""
+        post = Post.objects.filter(
+            is_published=True,
+            pub_date__lte=self.now,
+            category__is_published=True,
+        ).order_by('pk').first()
+        if post is None:
+            raise CommandError('Для --hot-comments нет постов в ленте.')
+        return post.pk
+
+    def create_comments(self, total, hot):
+        """Первые hot комментариев — к посту из ленты, остальные — к любым."""
+        posts = list(Post.objects.values_list('pk', flat=True))
+        authors = list(User.objects.values_list('pk', flat=True))
+        hot_post = self.get_hot_post() if hot else None
+        self.create(Comment, total + hot, lambda number: Comment(
+            text=self.sentence(12),
+            author_id=self.rng.choice(authors),
+            post_id=hot_post if number < hot else self.rng.choice(posts),
+        ))
+
+    def update_comment_counts(self):
+        """
+        Счётчики комментариев — по UPDATE на пачку постов:
+        подсчёт по индексу комментариев, без выборки в Python.
+        """
+        counts = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by().values('post').annotate(total=Count('pk')).values('total')
+        last = Post.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        for start in range(0, last, self.batch_size):
+            Post.objects.filter(
+                pk__gt=start, pk__lte=start + self.batch_size
+            ).update(comment_count=Coalesce(Subquery(counts), 0))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import bump_feed_version
+from blog.search import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс постов.'
+
+    def handle(self, *args, **options):
+        indexed = get_backend().rebuild()
+        # Закэшированные страницы поиска могли собраться по пустому индексу.
+        bump_feed_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {indexed}.'))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from blog.models import Comment, Post
+
+# Размер пачки постов по умолчанию.
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает и исправляет счётчики комментариев у постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько постов обрабатывать за одну транзакцию.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать расхождения, ничего не сохраняя.')
+
+    def handle(self, *args, batch_size, dry_run, **options):
+        last_pk = 0
+        checked = repaired = 0
+        while True:
+            with transaction.atomic():
+                posts = list(
+                    Post.objects.filter(pk__gt=last_pk)
+                    .order_by('pk').only('pk', 'comment_count')
+                    [:batch_size]
+                )
+                if not posts:
+                    break
+                last_pk = posts[-1].pk
+                counts = dict(
+                    Comment.objects.filter(
+                        post_id__gte=posts[0].pk, post_id__lte=last_pk)
+                    .order_by().values_list('post_id')
+                    .annotate(total=Count('pk'))
+                )
+                broken = []
+                for post in posts:
+                    actual = counts.get(post.pk, 0)
+                    if post.comment_count != actual:
+                        post.comment_count = actual
+                        broken.append(post)
+                if broken and not dry_run:
+                    Post.objects.bulk_update(broken, ['comment_count'])
+            checked += len(posts)
+            repaired += len(broken)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено постов: {checked}, '
+            f'{"расхождений" if dry_run else "исправлено"}: {repaired}.'
+        ))
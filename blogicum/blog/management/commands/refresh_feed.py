@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from blog import feed
+from blog.cache import bump_feed_version
+
+# Размер пачки постов по умолчанию.
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованную ленту постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько постов переносить за одну транзакцию.')
+
+    def handle(self, *args, batch_size, **options):
+        entries = feed.rebuild(batch_size)
+        bump_feed_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в ленте: {entries}.'))
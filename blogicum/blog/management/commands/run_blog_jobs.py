@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.tasks import run_pending
+
+# Пауза между проверками пустой очереди, секунд.
+POLL_INTERVAL = 2
+# Сколько задач брать за один проход.
+BATCH_SIZE = 20
+
+
+class Command(BaseCommand):
+    help = 'Обработчик фоновых задач из таблицы Job.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--sleep', type=float, default=POLL_INTERVAL,
+            help='Пауза, если задач нет, секунд.')
+
+    def handle(self, *args, once, batch_size, sleep, **options):
+        while True:
+            done = run_pending(batch_size)
+            if done:
+                self.stdout.write(f'Выполнено задач: {done}')
+            if once:
+                break
+            if not done:
+                time.sleep(sleep)
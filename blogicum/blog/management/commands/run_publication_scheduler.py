@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.scheduler import PublicationScheduler
+
+# Как часто перечитывать очередь публикаций, секунд:
+# за это время могут появиться новые отложенные посты.
+POLL_INTERVAL = 60
+# Сколько ближайших публикаций держать в памяти.
+LOOKAHEAD = 1000
+# Сколько постов рассылать за один проход.
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Планировщик отложенных публикаций: в момент публикации'
+        ' поста отправляет сигнал post_became_visible.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разослать наступившие публикации и завершиться.')
+        parser.add_argument(
+            '--poll', type=float, default=POLL_INTERVAL,
+            help='Наибольшая пауза между проверками, секунд.')
+        parser.add_argument(
+            '--lookahead', type=int, default=LOOKAHEAD)
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, once, poll, lookahead, batch_size, **options):
+        scheduler = PublicationScheduler(lookahead, batch_size)
+        reloaded_at = 0
+        while True:
+            published = scheduler.publish_due()
+            if published:
+                self.stdout.write(f'Опубликовано постов: {published}')
+            if once:
+                break
+            if not scheduler.heap or time.monotonic() - reloaded_at >= poll:
+                scheduler.reload()
+                reloaded_at = time.monotonic()
+            time.sleep(scheduler.seconds_until_next(poll))
@@ -0,0 +1,192 @@
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .routers import read_from_replica
+from .timing import DatabaseTimer, Timings, activate, deactivate, timed
+
+logger = logging.getLogger('blog.queries')
+timing_logger = logging.getLogger('blog.timing')
+
+# Приложения, ответы которых получают заголовок Server-Timing.
+SERVER_TIMING_APPS = ('blog', 'pages')
+
+# Cookie: недавно писал в базу — читать с основной.
+REPLICA_PIN_COOKIE = 'blogicum_primary'
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем разрешено."""
+
+    pass
+
+
+class QueryCollector:
+    """Подсчёт запросов к базе и их суммарного времени."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = defaultdict(set)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql].add(repr(params))
+
+    def repeated(self, threshold):
+        """
+        Один и тот же запрос, выполненный не меньше чем
+        с threshold разными параметрами, — признак N+1.
+        Повторы с теми же параметрами сюда не попадают.
+        """
+        return {
+            sql: len(params) for sql, params in self.statements.items()
+            if len(params) >= threshold
+        }
+
+
+class QueryBudgetMiddleware:
+    """
+    Бюджет запросов к базе на один запрос к сайту.
+    Настраивается словарём QUERY_BUDGET в settings:
+    ENABLED — включено ли, SAMPLE_RATE — доля проверяемых запросов,
+    DEFAULT и VIEWS — бюджет по умолчанию и по имени представления,
+    N_PLUS_ONE_THRESHOLD — со скольких разных параметров
+    повторы одного запроса считать N+1,
+    RAISE — падать ли с ошибкой при превышении (для тестов).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        config = settings.QUERY_BUDGET
+        if not config['ENABLED'] or random.random() >= config['SAMPLE_RATE']:
+            return self.get_response(request)
+        collector = QueryCollector()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(
+                    connections[alias].execute_wrapper(collector))
+            response = self.get_response(request)
+        self.check(request, collector, config)
+        return response
+
+    def check(self, request, collector, config):
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        budget = config['VIEWS'].get(view_name, config['DEFAULT'])
+        repeated = collector.repeated(config['N_PLUS_ONE_THRESHOLD'])
+        for sql, count in repeated.items():
+            logger.warning(
+                'N+1 in %s: query run with %d distinct params: %s',
+                view_name, count, sql)
+        if collector.count <= budget:
+            return
+        logger.warning(
+            'Query budget exceeded in %s: %d queries (budget %d), %.1f ms',
+            view_name, collector.count, budget, collector.duration * 1000)
+        if config['RAISE']:
+            raise QueryBudgetExceeded(
+                f'{view_name}: {collector.count} запросов к базе'
+                f' при бюджете {budget}')
+
+
+class ServerTimingMiddleware:
+    """
+    Заголовок Server-Timing с разбивкой времени ответа на фазы:
+    db, template, cache и view — всё остальное.
+    Те же цифры пишутся строкой JSON в лог blog.timing.
+    Должен стоять первым в MIDDLEWARE, чтобы учитывать всё
+    и последним получать process_template_response.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = Timings()
+        token = activate(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(DatabaseTimer()))
+                response = self.get_response(request)
+        finally:
+            deactivate(token)
+        total = time.perf_counter() - start
+        match = request.resolver_match
+        if match is None or match.app_name not in SERVER_TIMING_APPS:
+            return response
+        phases = {
+            phase: timings.phases[phase]
+            for phase in ('db', 'template', 'cache')
+        }
+        phases['view'] = total - sum(phases.values())
+        phases['total'] = total
+        response['Server-Timing'] = ', '.join(
+            f'{phase};dur={seconds * 1000:.1f}'
+            for phase, seconds in phases.items()
+        )
+        timing_logger.info(json.dumps({
+            'view': match.view_name,
+            'method': request.method,
+            'status': response.status_code,
+            **{
+                f'{phase}_ms': round(seconds * 1000, 1)
+                for phase, seconds in phases.items()
+            },
+        }))
+        return response
+
+    def process_template_response(self, request, response):
+        with timed('template'):
+            return response.render()
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Чтение с реплик для GET-запросов к представлениям
+    с read_from_replica = True (ленты и страница поста).
+    После любого изменяющего запроса клиент на REPLICA_PIN_SECONDS
+    получает cookie и читает с основной базы, чтобы сразу увидеть
+    свои изменения, даже если реплика отстаёт.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            response = self.get_response(request)
+        finally:
+            token = getattr(request, 'replica_token', None)
+            if token is not None:
+                read_from_replica.reset(token)
+        if settings.DATABASE_REPLICAS and request.method not in (
+                'GET', 'HEAD', 'OPTIONS'):
+            response.set_cookie(
+                REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if (request.method in ('GET', 'HEAD')
+                and getattr(view_class, 'read_from_replica', False)
+                and REPLICA_PIN_COOKIE not in request.COOKIES):
+            request.replica_token = read_from_replica.set(True)
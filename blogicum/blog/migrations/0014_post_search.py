@@ -0,0 +1,90 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:21
+
+import blog.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Внешняя таблица FTS5: хранит только индекс, текст берёт из blog_post.
+# Триггеры держат индекс в актуальном состоянии при любых изменениях,
+# включая bulk_create и update(). Счётчики и прочие поля поста
+# индекс не трогают: триггер обновления — только на title и text.
+CREATE_SEARCH = (
+    """
+    CREATE VIRTUAL TABLE blog_post_search USING fts5(
+        title, text,
+        content='blog_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    # Совпадение в заголовке весит вдесятеро больше, чем в тексте.
+    """
+    INSERT INTO blog_post_search(blog_post_search, rank)
+    VALUES ('rank', 'bm25(10.0, 1.0)')
+    """,
+    """
+    CREATE TRIGGER blog_post_search_insert AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_search(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_post_search_delete AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_search(blog_post_search, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_post_search_update
+    AFTER UPDATE OF title, text ON blog_post BEGIN
+        INSERT INTO blog_post_search(blog_post_search, rowid, title, text)
+        VALUES ('delete', old.id, old.title, old.text);
+        INSERT INTO blog_post_search(rowid, title, text)
+        VALUES (new.id, new.title, new.text);
+    END
+    """,
+    "INSERT INTO blog_post_search(blog_post_search) VALUES ('rebuild')",
+)
+
+DROP_SEARCH = (
+    'DROP TRIGGER IF EXISTS blog_post_search_insert',
+    'DROP TRIGGER IF EXISTS blog_post_search_delete',
+    'DROP TRIGGER IF EXISTS blog_post_search_update',
+    'DROP TABLE IF EXISTS blog_post_search',
+)
+
+
+def run_on_sqlite(statements):
+    """На PostgreSQL поиск строится на tsvector и таблица не нужна."""
+
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for statement in statements:
+                schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_post_image_content_addressed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearch',
+            fields=[
+                ('post', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='blog.post')),
+                ('title', models.CharField(max_length=256)),
+                ('text', models.TextField()),
+                ('document', blog.fields.SearchDocumentField(db_column='blog_post_search')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'blog_post_search',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(
+            run_on_sqlite(CREATE_SEARCH), run_on_sqlite(DROP_SEARCH)),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_feed_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Checkpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True, verbose_name='Процесс')),
+                ('pub_date', models.DateTimeField(verbose_name='Обработано до')),
+                ('pk_after', models.BigIntegerField(blank=True, null=True, verbose_name='Последний обработанный объект')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'контрольная точка',
+                'verbose_name_plural': 'Контрольные точки',
+            },
+        ),
+    ]
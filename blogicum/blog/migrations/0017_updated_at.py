@@ -0,0 +1,53 @@
+# Generated by Django 3.2.16 on 2026-10-17 07:05
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+# SQLite добавляет столбец, пересоздавая таблицу blog_post,
+# и при этом теряет её триггеры поискового индекса:
+# индекс снимается до изменения и строится заново после.
+search = import_module('blog.migrations.0014_post_search')
+
+
+def fill_updated_at(apps, schema_editor):
+    for name in ('Category', 'Location', 'Post'):
+        apps.get_model('blog', name).objects.update(
+            updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_checkpoint'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            search.run_on_sqlite(search.DROP_SEARCH),
+            search.run_on_sqlite(search.CREATE_SEARCH)),
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Изменено'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Изменено'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Изменено'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+        migrations.RunPython(
+            search.run_on_sqlite(search.CREATE_SEARCH),
+            search.run_on_sqlite(search.DROP_SEARCH)),
+    ]
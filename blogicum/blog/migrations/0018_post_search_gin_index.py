@@ -0,0 +1,45 @@
+# Generated by Django 3.2.16 on 2026-10-17 07:40
+
+from django.db import migrations
+
+# GIN-индекс по выражению PostgresSearchBackend.search: текст
+# совпадает с тем, что строит SearchVector (COALESCE, regconfig,
+# setweight), иначе планировщик индекс не использует.
+CREATE_SEARCH_INDEX = (
+    """
+    CREATE INDEX blog_post_search_idx ON blog_post USING GIN ((
+        setweight(to_tsvector('russian'::regconfig,
+                              COALESCE("title", '')), 'A')
+        || setweight(to_tsvector('russian'::regconfig,
+                                 COALESCE("text", '')), 'B')
+    ))
+    """,
+)
+
+DROP_SEARCH_INDEX = (
+    'DROP INDEX IF EXISTS blog_post_search_idx',
+)
+
+
+def run_on_postgresql(statements):
+    """На SQLite поиск идёт по таблице FTS5 из 0014."""
+
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            for statement in statements:
+                schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(CREATE_SEARCH_INDEX),
+            run_on_postgresql(DROP_SEARCH_INDEX)),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.16 on 2026-10-17 07:08
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0018_post_search_gin_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_published_pub_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_category_pub_date_idx',
+        ),
+        migrations.RemoveField(
+            model_name='feedentry',
+            name='comment_count',
+        ),
+    ]
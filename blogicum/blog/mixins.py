@@ -1,20 +1,154 @@
+import calendar
+import hashlib
+
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count
-from django.shortcuts import redirect, get_object_or_404
+from django.core.paginator import InvalidPage
+from django.http import Http404
+from django.middleware.csrf import get_token
+from django.db.models import F
+from django.shortcuts import redirect
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.views.generic import ListView
 from django.urls import reverse
 
-from .forms import CommentForm
-from .models import Post, Comment
+from .cache import (
+    feed_last_published_key, feed_page_key, feed_page_timeout,
+    get_feed_version, get_or_compute)
+from .forms import CommentForm, PostForm
+from .models import FeedEntry, Post, Comment
+from .paginators import (
+    CachedCountPaginator, HasNextPaginator, KeysetPaginator)
+from .timing import timed
 
-# Константа для пагинации.
+# Константы для пагинации.
 PAGINATOR_QUANTITY = 10
+COMMENTS_PAGINATOR_QUANTITY = 50
 
 # Константа для фильтрации.
-FROM_NEW_TO_OLD = '-pub_date'
+# pk нужен для однозначного порядка при пагинации по курсору.
+FROM_NEW_TO_OLD = ('-pub_date', '-pk')
+FROM_OLD_TO_NEW = ('created_at', 'pk')
+# Та же сортировка по столбцам материализованной ленты.
+FEED_ORDERING = ('-feed_pub_date', '-feed_post_id')
+
+
+class AnonymousCacheMixin:
+    """
+    Кэширование страниц целиком для анонимных пользователей:
+    им всем отдаётся одно и то же.
+    Сбрасывается при изменении постов, категорий, мест,
+    комментариев и пользователей.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+
+        def render():
+            response = super(AnonymousCacheMixin, self).dispatch(
+                request, *args, **kwargs)
+            with timed('template'):
+                return response.render()
+
+        return get_or_compute(
+            feed_page_key(request.get_full_path()),
+            render,
+            feed_page_timeout,
+            cacheable=lambda response: response.status_code == 200,
+        )
+
+
+class ConditionalGetMixin:
+    """
+    Ответ 304 Not Modified без отрисовки страницы, если у клиента
+    она не устарела. Валидаторы дешёвые: get_validators()
+    возвращает время последнего изменения (или None) и значения,
+    от которых зависит страница, — из индексов и кэша.
+    get_validators() же проверяет, что страница есть (иначе 404):
+    304 не отдаётся за скрытый или несуществующий объект.
+    В ETag входит ещё пользователь (от него зависит шапка),
+    а на страницах с формой — секрет CSRF. ETag слабый: токен
+    в форме каждый раз маскируется заново.
+    """
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    def has_csrf_form(self):
+        """Есть ли на странице форма с токеном CSRF."""
+        return False
+
+    def get_etag(self, parts):
+        request = self.request
+        parts = (request.user.pk, *parts)
+        if self.has_csrf_form():
+            # get_token() закрепляет секрет CSRF этого запроса: с ним же
+            # будет отрисована форма, а новый уйдёт клиенту в cookie.
+            get_token(request)
+            parts = (*parts, request.META['CSRF_COOKIE'])
+        raw = ':'.join(map(str, parts))
+        return f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        last_modified, parts = self.get_validators()
+        etag = self.get_etag(parts)
+        timestamp = (
+            calendar.timegm(last_modified.utctimetuple())
+            if last_modified else None)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+class FeedValidatorsMixin(ConditionalGetMixin):
+    """
+    Страница ленты меняется вместе с версией лент (её сбрасывают
+    все правки постов, категорий, мест, комментариев и авторов)
+    и с наступлением времени очередной публикации.
+    """
+
+    # Объект, чья это лента (категория, автор), — см. get_feed_object().
+    feed_object = None
+
+    def get_feed_key(self):
+        raise NotImplementedError
+
+    def get_feed_object(self):
+        """Объект ленты или Http404, если ленты нет. None — лента общая."""
+        return None
+
+    def get_last_published(self):
+        """Время публикации самого нового видимого поста ленты."""
+        raise NotImplementedError
+
+    def get_validators(self):
+        self.feed_object = self.get_feed_object()
+        version, changed_at = get_feed_version()
+        # Кэш живёт до ближайшей отложенной публикации.
+        last_published = get_or_compute(
+            feed_last_published_key(self.get_feed_key()),
+            self.get_last_published,
+            feed_page_timeout,
+        )
+        # Время смены версии неизвестно — Last-Modified не отдаём,
+        # остаётся ETag.
+        last_modified = changed_at and max(
+            filter(None, (changed_at, last_published)))
+        return last_modified, (version, last_published)
 
 
-class ListOfPostMixin(ListView):
+class ListOfPostMixin(
+        FeedValidatorsMixin, AnonymousCacheMixin, ListView):
     """Микс для формирования списка постов."""
 
     model = Post
@@ -23,8 +157,77 @@ class ListOfPostMixin(ListView):
 
     queryset = Post.objects.select_related(
         'category', 'location', 'author'
-    ).annotate(comment_count=Count('comments')
-               ).order_by(FROM_NEW_TO_OLD)
+    ).order_by(*FROM_NEW_TO_OLD)
+    # Сортировка для пагинации по курсору и признак того,
+    # что другой пагинации у списка нет.
+    keyset_ordering = FROM_NEW_TO_OLD
+    keyset_only = False
+    # Ленты только читают: их можно отдавать с реплик.
+    read_from_replica = True
+    # Считать ли посты для номеров страниц (число кэшируется);
+    # False — только «есть ли следующая», без COUNT(*).
+    count_pages = True
+
+    def get_feed_filters(self):
+        """Условия на записи материализованной ленты (FeedEntry)."""
+        return {}
+
+    def get_feed(self):
+        """
+        Видимые посты из материализованной ленты (FeedEntry):
+        отбор и сортировка идут по её индексу,
+        посты подтягиваются по первичному ключу.
+        """
+        filters = {
+            f'feed_entry__{lookup}': value
+            for lookup, value in self.get_feed_filters().items()
+        }
+        return self.queryset.annotate(
+            feed_pub_date=F('feed_entry__pub_date'),
+            feed_post_id=F('feed_entry__post'),
+        ).filter(
+            feed_pub_date__lte=timezone.now(), **filters
+        ).order_by(*FEED_ORDERING)
+
+    def get_last_published(self):
+        return FeedEntry.objects.filter(
+            pub_date__lte=timezone.now(), **self.get_feed_filters()
+        ).order_by('-pub_date').values_list('pub_date', flat=True).first()
+
+    def get_feed_key(self):
+        """Чем различаются ленты одного представления (для кэша)."""
+        kwargs = ','.join(
+            f'{key}={value}' for key, value in sorted(self.kwargs.items()))
+        return f'{self.request.resolver_match.view_name}:{kwargs}'
+
+    def get_paginator(self, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True, **kwargs):
+        if not self.count_pages:
+            return HasNextPaginator(
+                queryset, per_page,
+                allow_empty_first_page=allow_empty_first_page, **kwargs)
+        return CachedCountPaginator(
+            queryset, per_page, self.get_feed_key(), orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page, **kwargs)
+
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Пагинация по курсору, если в запросе передан
+        ?after=<курсор> или ?before=<курсор>
+        (пустой ?after= — первая страница в этом режиме).
+        Иначе — обычная пагинация по номеру страницы.
+        """
+        after = self.request.GET.get('after')
+        before = self.request.GET.get('before')
+        if after is None and before is None and not self.keyset_only:
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(
+            queryset, page_size, self.keyset_ordering)
+        try:
+            page = paginator.page(after=after, before=before)
+        except InvalidPage as error:
+            raise Http404(f'Некорректная страница: {error}')
+        return paginator, page, page.object_list, page.has_other_pages()
 
 
 class EditDeletePost(LoginRequiredMixin):
@@ -36,13 +239,20 @@ class EditDeletePost(LoginRequiredMixin):
 
     def dispatch(self, request, *args, **kwargs):
         """Проверка на права для удаления чужих постов."""
-        instance = get_object_or_404(
-            Post, pk=kwargs['post_id']
-        )
-        if instance.author != request.user:
+        instance = self.get_object()
+        if instance.author_id != request.user.pk:
             return redirect('blog:post_detail', instance.pk)
         return super().dispatch(request, *args, **kwargs)
 
+    def get_object(self, queryset=None):
+        """
+        Пост запрашивается один раз: в dispatch,
+        дальше UpdateView/DeleteView получают его же.
+        """
+        if not hasattr(self, '_object'):
+            self._object = super().get_object(queryset)
+        return self._object
+
 
 class EditDeleteComment(LoginRequiredMixin):
     """Микс для редактирования и удаления комментариев."""
@@ -55,19 +265,23 @@ class EditDeleteComment(LoginRequiredMixin):
     def dispatch(self, request, *args, **kwargs):
         """
         Проверка на права для удаления чужих комментариев.
-        Получение объектов комментария для проверки
-        и получение объекта поста для редиректа.
+        Комментарий ищется сразу в рамках поста из адреса,
+        поэтому сам пост для редиректа запрашивать не нужно.
         """
-        comment = get_object_or_404(
-            Comment, pk=kwargs['comment_id']
-        )
-        post = get_object_or_404(
-            Post, pk=kwargs['post_id']
-        )
-        if comment.author != request.user:
-            return redirect('blog:post_detail', post.pk)
+        comment = self.get_object()
+        if comment.author_id != request.user.pk:
+            return redirect('blog:post_detail', kwargs['post_id'])
         return super().dispatch(request, *args, **kwargs)
 
+    def get_queryset(self):
+        return super().get_queryset().filter(post_id=self.kwargs['post_id'])
+
+    def get_object(self, queryset=None):
+        """Комментарий запрашивается один раз за запрос."""
+        if not hasattr(self, '_object'):
+            self._object = super().get_object(queryset)
+        return self._object
+
     def get_success_url(self):
         return reverse(
             'blog:post_detail', kwargs={
@@ -89,3 +303,16 @@ class RedirectMixin(LoginRequiredMixin):
 
     def get_success_url(self):
         return self.success_url
+
+
+class PostFormMixin:
+    """Передача форме поста полей с прерванной загрузкой."""
+
+    form_class = PostForm
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        # Тело запроса уже разобрано: атрибут выставлен, если было что.
+        kwargs['oversized_uploads'] = getattr(
+            self.request, 'oversized_uploads', ())
+        return kwargs
@@ -1,6 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
+
+from .fields import SearchDocumentField
+from .storage import post_image_storage
 
 
 User = get_user_model()
@@ -18,6 +22,12 @@ class BaseModel(models.Model):
         auto_now_add=True,
         verbose_name='Добавлено'
     )
+    # Для ETag и Last-Modified страниц (blog.mixins.ConditionalGetMixin).
+    # У поста обновляется и при изменении его комментариев.
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменено'
+    )
 
     class Meta:
         abstract = True
@@ -101,15 +111,38 @@ class Post(BaseModel):
         verbose_name='Категория',
     )
 
+    # Файлы именуются хэшем содержимого (blog.storage),
+    # индекс нужен для подсчёта ссылок при удалении.
     image = models.ImageField('Изображениe',
-                              upload_to='media/%Y/%m/%d/',
-                              blank=True)
+                              upload_to='posts/',
+                              storage=post_image_storage,
+                              blank=True,
+                              db_index=True)
+    # «ширинаxвысота», заполняется фоновой задачей
+    # после загрузки изображения.
+    image_size = models.CharField(
+        'Размеры изображения', max_length=16, blank=True, default='',
+        editable=False)
+
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
         default_related_name = 'posts'
+        # Главная лента и ленты категорий читают FeedEntry.
+        indexes = (
+            # Лента профиля: автор видит и снятые с публикации посты.
+            models.Index(
+                fields=('author', 'pub_date', 'id'),
+                name='post_author_pub_date_idx',
+            ),
+        )
 
     def __str__(self):
         return self.title
@@ -118,6 +151,17 @@ class Post(BaseModel):
         return reverse('blog:post_detail',
                        args=(self.pk,))
 
+    def save(self, *args, **kwargs):
+        """
+        С новым изображением — в транзакции: файл, уже лежащий
+        в хранилище, проверяется после фиксации строки
+        (ContentAddressedStorage.restore), а не до неё.
+        """
+        if not self.image or self.image._committed:
+            return super().save(*args, **kwargs)
+        with transaction.atomic(savepoint=False):
+            return super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Модель для комментариев."""
@@ -145,6 +189,147 @@ class Comment(models.Model):
         verbose_name_plural = 'комментарии'
         ordering = ('created_at',)
         default_related_name = 'comments'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_created_at_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text
+
+
+class FeedEntry(models.Model):
+    """
+    Материализованная лента: опубликованные посты
+    опубликованных категорий, в том числе отложенные —
+    время публикации проверяется по pub_date при чтении.
+    Поддерживается сигналами (blog.feed), пересобирается
+    командой refresh_feed.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='feed_entry',
+    )
+    # Индекс по категории — первое поле feed_category_pub_date_idx.
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        db_index=False,
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+        # post замыкает индексы: сортировка (pub_date, post)
+        # целиком идёт по индексу, без временного B-дерева.
+        indexes = (
+            models.Index(
+                fields=('pub_date', 'post'), name='feed_pub_date_idx'),
+            models.Index(
+                fields=('category', 'pub_date', 'post'),
+                name='feed_category_pub_date_idx'),
+        )
+
+    def __str__(self):
+        return str(self.post_id)
+
+
+class PostSearch(models.Model):
+    """
+    Поисковый индекс постов: внешняя таблица FTS5 SQLite
+    поверх blog_post. Создаётся миграцией и обновляется
+    триггерами, поэтому Django ею не управляет.
+    Миграция, которая пересоздаёт blog_post (в SQLite — почти
+    любое изменение столбцов), должна пересоздать и индекс,
+    как 0017_updated_at.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search',
+    )
+    title = models.CharField(max_length=256)
+    text = models.TextField()
+    document = SearchDocumentField(db_column='blog_post_search')
+    # Скрытый столбец FTS5: bm25 с весами из миграции,
+    # чем меньше, тем релевантнее.
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'blog_post_search'
+
+
+class Job(models.Model):
+    """Фоновая задача."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=64)
+    payload = models.JSONField('Параметры', default=dict)
+    status = models.CharField(
+        'Статус', max_length=16, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    run_after = models.DateTimeField('Запустить после', default=timezone.now)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('run_after',)
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'),
+                name='job_status_run_after_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} {self.payload}'
+
+
+class Checkpoint(models.Model):
+    """
+    Позиция фонового процесса, переживающая перезапуск:
+    до какого места (pub_date, pk) события уже разосланы.
+    Пустой pk — разосланы все события до pub_date включительно.
+    """
+
+    name = models.CharField('Процесс', max_length=64, unique=True)
+    pub_date = models.DateTimeField('Обработано до')
+    pk_after = models.BigIntegerField(
+        'Последний обработанный объект', null=True, blank=True)
+    updated_at = models.DateTimeField('Обновлено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'контрольная точка'
+        verbose_name_plural = 'Контрольные точки'
+
+    def __str__(self):
+        return f'{self.name}: {self.pub_date}'
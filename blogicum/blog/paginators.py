@@ -0,0 +1,247 @@
+import base64
+import binascii
+from collections.abc import Sequence
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import (
+    EmptyPage, InvalidPage, Page, PageNotAnInteger, Paginator)
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .cache import feed_count_key, feed_page_timeout, get_or_compute
+
+# Разделитель значений внутри курсора.
+CURSOR_SEPARATOR = ','
+
+# Сколько номеров страниц показывать вокруг текущей и с краёв.
+PAGES_ON_EACH_SIDE = 2
+PAGES_ON_ENDS = 1
+
+
+class InvalidCursor(InvalidPage):
+    """Курсор повреждён или не соответствует сортировке."""
+
+    pass
+
+
+def encode_cursor(values):
+    """Упаковка значений ключа сортировки в непрозрачный токен."""
+    raw = CURSOR_SEPARATOR.join(
+        value.isoformat() if isinstance(value, datetime) else str(value)
+        for value in values
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Распаковка токена обратно в список строковых значений."""
+    try:
+        raw = base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor('Некорректный курсор')
+    values = raw.split(CURSOR_SEPARATOR)
+    if len(values) != size:
+        raise InvalidCursor('Некорректный курсор')
+    return values
+
+
+class KeysetPage(Sequence):
+    """Страница, построенная по курсору, а не по номеру."""
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator,
+                 next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Keyset page of %s objects>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Пагинатор по курсору (keyset pagination).
+    Вместо OFFSET страница начинается с условия
+    «строго после/до ключа сортировки последнего показанного объекта»,
+    поэтому её стоимость не зависит от глубины.
+    Сортировка должна быть уникальной (последнее поле — pk)
+    и во всех полях иметь одно направление.
+    """
+
+    def __init__(self, object_list, per_page, ordering):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = tuple(field.lstrip('-') for field in self.ordering)
+        self.descending = self.ordering[0].startswith('-')
+
+    def get_key(self, obj):
+        """Значения полей сортировки для объекта."""
+        values = []
+        for field in self.fields:
+            value = obj
+            for attr in field.split('__'):
+                value = getattr(value, attr)
+            values.append(value)
+        return values
+
+    def filter_after(self, queryset, values, forward=True):
+        """
+        Условие «строго после ключа» в порядке сортировки
+        (или «строго до», если forward=False).
+        """
+        lookup = 'lt' if self.descending == forward else 'gt'
+        condition = Q()
+        for index, field in enumerate(self.fields):
+            step = Q(**{f'{field}__{lookup}': values[index]})
+            for previous, value in zip(self.fields[:index], values):
+                step &= Q(**{previous: value})
+            condition |= step
+        try:
+            return queryset.filter(condition)
+        except (ValidationError, ValueError, TypeError):
+            raise InvalidCursor('Некорректный курсор')
+
+    def page(self, after=None, before=None):
+        """Страница после курсора after или перед курсором before."""
+        queryset = self.object_list
+        if before is not None:
+            values = decode_cursor(before, len(self.fields))
+            reverse_ordering = tuple(
+                field[1:] if field.startswith('-') else f'-{field}'
+                for field in self.ordering
+            )
+            rows = list(
+                self.filter_after(queryset, values, forward=False)
+                .order_by(*reverse_ordering)[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            if after:
+                values = decode_cursor(after, len(self.fields))
+                queryset = self.filter_after(queryset, values)
+            rows = list(
+                queryset.order_by(*self.ordering)[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            has_previous = bool(after)
+        return KeysetPage(
+            rows,
+            self,
+            next_cursor=(
+                encode_cursor(self.get_key(rows[-1]))
+                if has_next and rows else None),
+            previous_cursor=(
+                encode_cursor(self.get_key(rows[0]))
+                if has_previous and rows else None),
+        )
+
+
+class WindowedPage(Page):
+    """Страница со списком номеров «1 … 4 5 [6] 7 8 … 120»."""
+
+    @cached_property
+    def page_range(self):
+        return list(self.paginator.get_elided_page_range(
+            self.number,
+            on_each_side=PAGES_ON_EACH_SIDE,
+            on_ends=PAGES_ON_ENDS,
+        ))
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Пагинатор, который берёт число объектов из кэша лент:
+    COUNT(*) по ленте стоит столько же, сколько сама страница.
+    Кэш сбрасывается вместе со страницами лент (версия лент)
+    и живёт не дольше, чем до ближайшей отложенной публикации.
+    count_key различает ленты (главная, категория и т. п.).
+    """
+
+    def __init__(self, object_list, per_page, count_key, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        return get_or_compute(
+            feed_count_key(self.count_key),
+            self.object_list.count,
+            feed_page_timeout,
+        )
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+
+class HasNextPage(Page):
+    """Страница, о которой известно только, есть ли следующая."""
+
+    page_range = ()
+
+    def __init__(self, object_list, number, paginator, next_exists):
+        super().__init__(object_list, number, paginator)
+        self.next_exists = next_exists
+
+    def has_next(self):
+        return self.next_exists
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return self.paginator.per_page * (self.number - 1) + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class HasNextPaginator(Paginator):
+    """
+    Пагинатор по номеру страницы без подсчёта объектов:
+    выбирается на одну строку больше страницы, и по ней
+    видно, есть ли следующая. Последняя страница неизвестна.
+    """
+
+    # Без подсчёта число страниц неизвестно: ?page=last — 404.
+    num_pages = None
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть целым числом')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and (number > 1 or not self.allow_empty_first_page):
+            raise EmptyPage('На этой странице нет результатов')
+        return HasNextPage(
+            rows[:self.per_page], number, self,
+            next_exists=len(rows) > self.per_page)
@@ -0,0 +1,36 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Читать ли текущему запросу с реплик; ставит ReplicaRoutingMiddleware.
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def reads_from_replica():
+    """Идёт ли чтение текущего запроса с реплик."""
+    return bool(settings.DATABASE_REPLICAS) and read_from_replica.get()
+
+
+class ReplicaRouter:
+    """
+    Чтение — с одной из реплик DATABASE_REPLICAS, но только
+    для представлений с read_from_replica = True; запись и всё
+    остальное — в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        if reads_from_replica():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Реплики — копии основной базы, связи между ними допустимы."""
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        """Схема попадает на реплики вместе с данными."""
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,113 @@
+import heapq
+import logging
+
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Checkpoint, FeedEntry, Post
+
+logger = logging.getLogger('blog.scheduler')
+
+# Отправляется, когда наступает время публикации поста:
+# sender=Post, instance — пост.
+post_became_visible = Signal()
+
+# Имя контрольной точки планировщика в таблице Checkpoint.
+CHECKPOINT = 'publications'
+
+
+class PublicationScheduler:
+    """
+    Рассылка post_became_visible в момент публикации.
+    Очередь ближайших публикаций — куча (pub_date, pk), загруженная
+    из ленты по индексу feed_pub_date_idx; она задаёт только время
+    пробуждения. Какие посты стали видимы, каждый раз решает запрос
+    к ленте после контрольной точки, поэтому перенесённые и удалённые
+    посты не требуют правки кучи, а после перезапуска рассылаются
+    пропущенные за время простоя публикации.
+    """
+
+    def __init__(self, lookahead=1000, batch_size=500):
+        self.lookahead = lookahead
+        self.batch_size = batch_size
+        self.heap = []
+
+    def get_checkpoint(self):
+        """При первом запуске прошлые публикации не рассылаются."""
+        return Checkpoint.objects.get_or_create(
+            name=CHECKPOINT, defaults={'pub_date': timezone.now()})[0]
+
+    def reload(self):
+        """Загрузка ближайших отложенных публикаций в кучу."""
+        self.heap = list(
+            FeedEntry.objects.filter(pub_date__gt=timezone.now())
+            .order_by('pub_date', 'post')
+            .values_list('pub_date', 'post_id')[:self.lookahead]
+        )
+        heapq.heapify(self.heap)
+
+    def next_publication(self):
+        return self.heap[0][0] if self.heap else None
+
+    def seconds_until_next(self, poll_interval):
+        """Сколько ждать до ближайшей публикации, не дольше poll_interval."""
+        next_publication = self.next_publication()
+        if next_publication is None:
+            return poll_interval
+        wait = (next_publication - timezone.now()).total_seconds()
+        return max(0, min(wait, poll_interval))
+
+    def due(self, checkpoint, now):
+        """Пачка опубликованных после контрольной точки и до now."""
+        after = Q(pub_date__gt=checkpoint.pub_date)
+        if checkpoint.pk_after is not None:
+            after |= Q(
+                pub_date=checkpoint.pub_date, post__gt=checkpoint.pk_after)
+        return list(
+            FeedEntry.objects.filter(after, pub_date__lte=now)
+            .select_related('post')
+            .order_by('pub_date', 'post')[:self.batch_size]
+        )
+
+    def advance(self, checkpoint, pub_date, pk_after):
+        """
+        Сдвиг контрольной точки, только если её не сдвинул
+        другой процесс. Возвращает, удался ли сдвиг.
+        """
+        moved = Checkpoint.objects.filter(
+            pk=checkpoint.pk, pub_date=checkpoint.pub_date,
+            pk_after=checkpoint.pk_after,
+        ).update(pub_date=pub_date, pk_after=pk_after,
+                 updated_at=timezone.now())
+        checkpoint.pub_date, checkpoint.pk_after = pub_date, pk_after
+        return moved == 1
+
+    def publish_due(self):
+        """
+        Рассылка событий для наступивших публикаций пачками.
+        Точка сдвигается после рассылки пачки: при сбое события
+        повторятся, а не потеряются. Возвращает число постов.
+        """
+        checkpoint = self.get_checkpoint()
+        now = timezone.now()
+        published = 0
+        while True:
+            entries = self.due(checkpoint, now)
+            for entry in entries:
+                post_became_visible.send(sender=Post, instance=entry.post)
+            published += len(entries)
+            if len(entries) < self.batch_size:
+                moved = self.advance(checkpoint, now, None)
+            else:
+                last = entries[-1]
+                moved = self.advance(checkpoint, last.pub_date, last.pk)
+            if not moved:
+                logger.warning('Checkpoint %s moved by another process',
+                               CHECKPOINT)
+                break
+            if len(entries) < self.batch_size:
+                break
+        while self.heap and self.heap[0][0] <= now:
+            heapq.heappop(self.heap)
+        return published
@@ -0,0 +1,180 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import feed
+from .cache import bump_feed_version, bump_users_version, bump_version
+from .models import Category, Comment, Location, Post
+from .scheduler import post_became_visible
+from .tasks import enqueue, release_post_image
+
+# Посты, которые сейчас удаляются: их комментарии удаляются каскадно
+# раньше самого поста, и обновлять счётчик незачем.
+deleting_posts = ContextVar('deleting_posts', default=frozenset())
+
+
+@receiver(post_save, sender=Comment)
+def increase_comment_count(sender, instance, created, **kwargs):
+    """Увеличение счётчика комментариев поста при добавлении."""
+    if created and not kwargs.get('raw'):
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1, updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Comment)
+def touch_post_on_comment_edit(sender, instance, created, **kwargs):
+    """
+    Правка комментария меняет страницу поста: время изменения
+    поста — её Last-Modified (blog.views.PostDetail).
+    """
+    if not created and not kwargs.get('raw'):
+        Post.objects.filter(pk=instance.post_id).update(
+            updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleting_post(sender, instance, **kwargs):
+    deleting_posts.set(deleting_posts.get() | {instance.pk})
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleting_post(sender, instance, **kwargs):
+    deleting_posts.set(deleting_posts.get() - {instance.pk})
+
+
+@receiver(post_delete, sender=Comment)
+def decrease_comment_count(sender, instance, **kwargs):
+    """
+    Уменьшение счётчика при удалении комментария,
+    в том числе каскадном (вместе с автором).
+    При удалении самого поста Django удаляет комментарии
+    до него, по сигналу на каждый: их пропускаем.
+    """
+    if instance.post_id in deleting_posts.get():
+        return
+    Post.objects.filter(
+        pk=instance.post_id, comment_count__gt=0
+    ).update(
+        comment_count=F('comment_count') - 1, updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_caches(sender, instance, **kwargs):
+    """
+    Сброс закэшированных карточек постов, связанных с объектом,
+    и страниц лент для анонимов.
+    """
+    bump_version(instance)
+    bump_feed_version()
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_caches(sender, instance, update_fields=None, **kwargs):
+    """
+    Пользователь выводится и в карточках своих постов, и в комментариях
+    к чужим — там кэш сбрасывается общей версией пользователей.
+    Вход пользователя (обновление last_login) кэш не меняет.
+    """
+    if update_fields != {'last_login'}:
+        invalidate_caches(sender, instance)
+        bump_users_version()
+
+
+@receiver(post_save, sender=Post)
+def sync_feed_entry(sender, instance, created, raw=False, **kwargs):
+    """
+    Обновление материализованной ленты. Записи удалённых постов
+    удаляются каскадно. После loaddata ленту пересобирает
+    команда refresh_feed.
+    """
+    if not raw:
+        feed.sync_post(instance, created)
+
+
+@receiver(post_save, sender=Category)
+def sync_category_feed(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        feed.sync_category(instance)
+
+
+@receiver(post_became_visible)
+def publish_scheduled_post(sender, instance, **kwargs):
+    """
+    Отложенный пост появился в лентах: страницы лент
+    и карточка поста собираются заново.
+    """
+    bump_version(instance)
+    bump_feed_version()
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_feeds(sender, instance, **kwargs):
+    """
+    Карточка учитывает число комментариев в ключе, ленты — нет.
+    Удаление поста сбрасывает ленты само.
+    """
+    if instance.post_id not in deleting_posts.get():
+        bump_feed_version()
+
+
+@receiver(post_save, sender=Post)
+def process_post_image(sender, instance, raw=False, **kwargs):
+    """
+    Обработка нового или заменённого изображения в фоне:
+    запрос на загрузку не ждёт уменьшения и перекодирования.
+    """
+    previous = getattr(instance, '_previous_image', None)
+    if instance.image and not raw and instance.image.name != previous:
+        enqueue('process_post_image', post_id=instance.pk)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_image(sender, instance, raw=False, **kwargs):
+    """
+    Запоминание прежнего файла: новое изображение нужно обработать,
+    а заменённое — освободить.
+    """
+    instance._previous_image = None
+    if instance.pk and not raw:
+        instance._previous_image = Post.objects.filter(
+            pk=instance.pk).values_list('image', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_image', None)
+    if previous and previous != instance.image.name:
+        transaction.on_commit(lambda: release_post_image(previous))
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    """Файл удаляется, только когда на него не ссылается ни один пост."""
+    if instance.image:
+        name = instance.image.name
+        transaction.on_commit(lambda: release_post_image(name))
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Настройка нового соединения с SQLite из SQLITE_PRAGMAS."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
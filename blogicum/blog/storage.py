@@ -0,0 +1,117 @@
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import PurePosixPath
+from uuid import uuid4
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+# Имя файла в хранилище: <каталог>/ab/cd/<sha256><хвост>,
+# где хвост — расширение или, у производных файлов, «.card.jpg» и т. п.
+CONTENT_ADDRESSED_NAME = re.compile(
+    r'(?:^|/)(?P<a>[0-9a-f]{2})/(?P<b>[0-9a-f]{2})/'
+    r'(?P=a)(?P=b)[0-9a-f]{60}(?:\.[\w-]+)*$'
+)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Хранилище файлов по хэшу содержимого.
+    Одинаковые загрузки хранятся одним файлом, а содержимое
+    по одному адресу никогда не меняется, поэтому такие URL
+    можно отдавать с Cache-Control: immutable.
+    Файлы, чьё имя уже имеет такой вид (например, уменьшенные копии
+    рядом с оригиналом), сохраняются под своим именем.
+    """
+
+    def __init__(self, prefix='posts', **kwargs):
+        super().__init__(**kwargs)
+        self.prefix = prefix
+
+    def get_available_name(self, name, max_length=None):
+        """Имя определяется содержимым, суффиксы не нужны."""
+        return name
+
+    def _save(self, name, content):
+        if not CONTENT_ADDRESSED_NAME.search(name):
+            name = self.content_name(name, content)
+            if self.exists(name):
+                # Файл может удалить delete_unreferenced, пока ссылка
+                # на него ещё не зафиксирована: проверим после фиксации.
+                # Вне транзакции on_commit сработает сразу, поэтому
+                # Post.save идёт в atomic().
+                transaction.on_commit(lambda: self.restore(name, content))
+                return name
+        self.write(name, content)
+        return name
+
+    def write(self, name, content):
+        directory = os.path.dirname(self.path(name))
+        os.makedirs(directory, exist_ok=True)
+        # Запись во временный файл и атомарная замена: параллельная
+        # загрузка того же содержимого не увидит файл недописанным.
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in content.chunks():
+                    file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temp_path, self.file_permissions_mode)
+            else:
+                os.chmod(temp_path, 0o666 & ~current_umask())
+            os.replace(temp_path, self.path(name))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def restore(self, name, content):
+        """Запись заново файла, удалённого после проверки в _save."""
+        if not self.exists(name) and not content.closed:
+            content.seek(0)
+            self.write(name, content)
+
+    def delete_unreferenced(self, name, is_referenced):
+        """
+        Удаление файла, на который is_referenced() не находит ссылок.
+        Файл сначала переименовывается, и ссылки проверяются ещё раз:
+        загрузка того же содержимого, успевшая на него сослаться,
+        его сохранит, а не успевшая — запишет заново (restore).
+        Возвращает True, если файл удалён.
+        """
+        if is_referenced():
+            return False
+        path = self.path(name)
+        tombstone = f'{path}.{uuid4().hex}.deleted'
+        try:
+            os.rename(path, tombstone)
+        except FileNotFoundError:
+            return False
+        if is_referenced():
+            # Содержимое по адресу не меняется: возвращаем поверх.
+            os.replace(tombstone, path)
+            return False
+        os.unlink(tombstone)
+        return True
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+        extension = PurePosixPath(name).suffix.lower()
+        return f'{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def current_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+post_image_storage = ContentAddressedStorage()
@@ -0,0 +1,188 @@
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import bump_feed_version, bump_version
+from .images import generate_renditions, has_renditions, rendition_names
+from .models import Job, Post
+from .uploads import check_dimensions
+
+logger = logging.getLogger('blog.tasks')
+
+# Зарегистрированные задачи: имя -> функция.
+TASKS = {}
+
+# Тег ориентации в EXIF.
+EXIF_ORIENTATION = 0x0112
+
+
+def task(func):
+    """Регистрация функции как фоновой задачи."""
+    TASKS[func.__name__] = func
+    return func
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.BLOG_TASKS['WORKERS'],
+        thread_name_prefix='blog-tasks',
+    )
+
+
+def enqueue(name, **payload):
+    """
+    Постановка задачи в очередь.
+    Задача всегда сохраняется в таблицу Job, а дальше по BLOG_TASKS['MODE']:
+    sync — выполняется сразу, thread — в пуле потоков этого процесса
+    после фиксации транзакции, worker — только командой run_blog_jobs.
+    Если процесс упадёт, не выполнив задачу, её подберёт run_blog_jobs.
+    """
+    job = Job.objects.create(name=name, payload=payload)
+    mode = settings.BLOG_TASKS['MODE']
+    if mode == 'sync':
+        run_job(job.pk)
+    elif mode == 'thread':
+        transaction.on_commit(
+            lambda: get_executor().submit(run_job_in_thread, job.pk))
+    return job
+
+
+def claim(job_id):
+    """
+    Атомарный захват задачи, чтобы её не выполнили дважды.
+    Зависшие задачи (упавший обработчик) можно захватить повторно.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.BLOG_TASKS['TIMEOUT'])
+    return Job.objects.filter(
+        Q(status=Job.PENDING) | Q(status=Job.RUNNING, locked_at__lt=stale),
+        pk=job_id,
+    ).update(
+        status=Job.RUNNING, locked_at=now, attempts=F('attempts') + 1
+    ) == 1
+
+
+def release_post_image(name):
+    """
+    Удаление файла изображения, на который больше не ссылается
+    ни один пост. Одинаковые загрузки делят один файл, поэтому
+    удалять его вместе с постом нельзя.
+    """
+    storage = Post._meta.get_field('image').storage
+    if name and storage.delete_unreferenced(
+            name, Post.objects.filter(image=name).exists):
+        # Сам файл уже удалён: повторное удаление стёрло бы
+        # записанный заново (ContentAddressedStorage.restore).
+        for rendition in rendition_names(name):
+            storage.delete(rendition)
+
+
+def run_job(job_id):
+    """Выполнение задачи с повтором при ошибке."""
+    if not claim(job_id):
+        return
+    job = Job.objects.get(pk=job_id)
+    try:
+        TASKS[job.name](**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < settings.BLOG_TASKS['MAX_ATTEMPTS']:
+            job.status = Job.PENDING
+            job.run_after = timezone.now() + timedelta(
+                seconds=settings.BLOG_TASKS['RETRY_DELAY'] * job.attempts)
+        else:
+            job.status = Job.FAILED
+        logger.exception('Job %s failed (attempt %d)', job, job.attempts)
+    else:
+        job.status = Job.DONE
+    job.save(update_fields=('status', 'run_after', 'last_error'))
+
+
+def run_job_in_thread(job_id):
+    try:
+        run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def run_pending(limit):
+    """Выполнение готовых к запуску задач. Возвращает их число."""
+    stale = timezone.now() - timedelta(
+        seconds=settings.BLOG_TASKS['TIMEOUT'])
+    job_ids = list(
+        Job.objects.filter(
+            Q(status=Job.PENDING, run_after__lte=timezone.now())
+            | Q(status=Job.RUNNING, locked_at__lt=stale)
+        ).values_list('pk', flat=True)[:limit]
+    )
+    for job_id in job_ids:
+        run_job(job_id)
+    return len(job_ids)
+
+
+@task
+def process_post_image(post_id):
+    """
+    Обработка загруженного изображения поста:
+    размеры, удаление метаданных EXIF и уменьшенные копии.
+    Очищенный от EXIF файл получает новое имя по хэшу содержимого:
+    файл по уже выданному адресу не меняется.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    image = post.image
+    original_name = image.name
+    with image.storage.open(image.name) as file:
+        source = Image.open(file)
+        # Файл мог попасть в хранилище в обход формы.
+        check_dimensions(*source.size)
+        source.load()
+    width, height = source.size
+    orientation = source.getexif().get(EXIF_ORIENTATION, 1)
+    if source.format == 'JPEG' and source.getexif():
+        if orientation == 1:
+            # Таблицы квантования исходника: без потери качества.
+            cleaned, options = source, {
+                'quality': 'keep', 'subsampling': 'keep'}
+        else:
+            # Без EXIF поворот потеряется — применяем его к пикселям.
+            cleaned, options = ImageOps.exif_transpose(source), {
+                'quality': 95}
+            width, height = cleaned.size
+        buffer = BytesIO()
+        cleaned.save(
+            buffer, 'JPEG',
+            icc_profile=source.info.get('icc_profile'), **options)
+        image.name = image.storage.save(
+            PurePosixPath(original_name).name, ContentFile(buffer.getvalue()))
+    # Изображение могли заменить, пока шла обработка: тогда
+    # очищенная копия никому не нужна, новое обработает своя задача.
+    updated = Post.objects.filter(pk=post_id, image=original_name).update(
+        image=image.name, image_size=f'{width}x{height}',
+        updated_at=timezone.now())
+    if not updated:
+        if image.name != original_name:
+            release_post_image(image.name)
+        return
+    if image.name != original_name:
+        release_post_image(original_name)
+    # Имя файла задаёт содержимое: готовые копии от такой же
+    # загрузки подходят и этому посту.
+    if not has_renditions(image):
+        generate_renditions(image)
+    # Карточка могла закэшироваться с оригиналом вместо копий.
+    bump_version(post)
+    bump_feed_version()
@@ -0,0 +1,42 @@
+from django import template
+
+from blog.cache import get_versions, read_source
+from blog.images import (
+    RENDITIONS, RENDITION_FORMATS, has_renditions, rendition_name)
+
+register = template.Library()
+
+
+@register.filter
+def card_version(post):
+    """
+    Версия карточки поста: сам пост, его категория, место и автор,
+    и база, с которой они прочитаны.
+    """
+    versions = get_versions(
+        post, post.category, post.location, post.author)
+    return f'{read_source()}:{versions}'
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, rendition='card'):
+    """
+    Изображение поста с уменьшенными копиями через srcset.
+    Пока копий нет, выводится оригинал.
+    """
+    image = post.image
+    if not has_renditions(image):
+        return {'src': image.url}
+    srcsets = {
+        extension: ', '.join(
+            f'{image.storage.url(rendition_name(image.name, name, extension))}'
+            f' {width}w'
+            for name, width in RENDITIONS.items()
+        )
+        for extension in RENDITION_FORMATS
+    }
+    return {
+        'src': image.storage.url(rendition_name(image.name, rendition, 'jpg')),
+        'srcset': srcsets['jpg'],
+        'webp_srcset': srcsets['webp'],
+    }
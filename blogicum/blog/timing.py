@@ -0,0 +1,96 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+from django.utils.module_loading import import_string
+
+_current = ContextVar('timings', default=None)
+
+
+class Timings:
+    """
+    Время обработки запроса по фазам (база, шаблоны, кэш).
+    Фазы не пересекаются: время вложенной фазы
+    вычитается из объемлющей.
+    """
+
+    def __init__(self):
+        self.phases = defaultdict(float)
+        self._stack = []
+
+    def start(self):
+        self._stack.append(0.0)
+
+    def stop(self, phase, elapsed):
+        nested = self._stack.pop()
+        self.phases[phase] += elapsed - nested
+        if self._stack:
+            self._stack[-1] += elapsed
+
+
+def activate(timings):
+    return _current.set(timings)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(phase):
+    """Учёт времени блока в фазе phase текущего запроса."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    timings.start()
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.stop(phase, perf_counter() - start)
+
+
+class DatabaseTimer:
+    """Учёт запросов к базе через connection.execute_wrapper."""
+
+    def __call__(self, execute, sql, params, many, context):
+        with timed('db'):
+            return execute(sql, params, many, context)
+
+
+class TimedCache:
+    """
+    Обёртка кэш-бэкенда, учитывающая обращения к кэшу в фазе cache,
+    в том числе из {% cache %} в шаблонах. Настоящий бэкенд задаётся
+    ключом TIMED_BACKEND записи в CACHES, остальные её параметры
+    передаются ему как есть.
+    """
+
+    TIMED_METHODS = frozenset((
+        'add', 'get', 'set', 'touch', 'delete', 'get_many', 'get_or_set',
+        'has_key', 'incr', 'decr', 'set_many', 'delete_many', 'clear',
+    ))
+
+    def __init__(self, location, params):
+        params = dict(params)
+        backend = import_string(params.pop('TIMED_BACKEND'))
+        self._backend = backend(location, params)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._backend, name)
+        if name not in self.TIMED_METHODS:
+            return attribute
+
+        @wraps(attribute)
+        def method(*args, **kwargs):
+            with timed('cache'):
+                return attribute(*args, **kwargs)
+
+        return method
+
+    def __contains__(self, key):
+        with timed('cache'):
+            return key in self._backend
@@ -0,0 +1,86 @@
+import warnings
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadhandler import (
+    StopUpload, TemporaryFileUploadHandler)
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
+
+
+class LimitedUploadHandler(TemporaryFileUploadHandler):
+    """
+    Загрузка файлов потоком во временный файл на диске.
+    Как только файл превышает IMAGE_UPLOAD['MAX_SIZE'], разбор
+    запроса останавливается, не дочитывая тело, а имя поля
+    попадает в request.oversized_uploads — форма покажет ошибку.
+    """
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > settings.IMAGE_UPLOAD['MAX_SIZE']:
+            self.request.oversized_uploads = {
+                *getattr(self.request, 'oversized_uploads', ()),
+                self.field_name,
+            }
+            raise StopUpload(connection_reset=True)
+        return super().receive_data_chunk(raw_data, start)
+
+
+def get_image_dimensions(file):
+    """
+    Размеры изображения из заголовка файла: Pillow открывает
+    файл лениво и пиксели не распаковывает.
+    None — если файл не изображение.
+    """
+    position = file.tell()
+    file.seek(0)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+            return Image.open(file).size
+    except Image.DecompressionBombError:
+        raise
+    except Exception:
+        return None
+    finally:
+        file.seek(position)
+
+
+def check_dimensions(width, height):
+    limits = settings.IMAGE_UPLOAD
+    if (max(width, height) > limits['MAX_SIDE']
+            or width * height > limits['MAX_PIXELS']):
+        raise ValidationError(
+            'Изображение слишком большое: %(width)d×%(height)d пикселей.'
+            ' Наибольшая сторона — %(max_side)d пикселей.',
+            code='image_too_large',
+            params={
+                'width': width, 'height': height,
+                'max_side': limits['MAX_SIDE'],
+            },
+        )
+
+
+def file_too_large():
+    max_size = settings.IMAGE_UPLOAD['MAX_SIZE']
+    return ValidationError(
+        'Размер файла не должен превышать %(max_size)s.',
+        code='file_too_large',
+        params={'max_size': filesizeformat(max_size)},
+    )
+
+
+def check_image_upload(file):
+    """
+    Проверка загрузки до того, как изображение будет открыто целиком:
+    размер файла, затем размеры из заголовка и число пикселей.
+    """
+    if file.size > settings.IMAGE_UPLOAD['MAX_SIZE']:
+        raise file_too_large()
+    try:
+        dimensions = get_image_dimensions(file)
+    except Image.DecompressionBombError:
+        raise ValidationError(
+            'Изображение слишком большое.', code='image_too_large')
+    if dimensions is not None:
+        check_dimensions(*dimensions)
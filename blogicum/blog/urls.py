@@ -10,6 +10,9 @@ urlpatterns = [
     path('',
          views.BlogHome.as_view(),
          name='index'),
+    path('search/',
+         views.SearchPosts.as_view(),
+         name='search'),
     path(
         'posts/<int:post_id>/',
         views.PostDetail.as_view(),
@@ -38,6 +41,10 @@ urlpatterns = [
         'posts/<int:post_id>/delete/',
         views.DeletePost.as_view(),
         name='delete_post'),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.PostComments.as_view(),
+        name='post_comments'),
     path(
         'posts/<int:post_id>/comment/',
         views.AddComment.as_view(),
@@ -1,79 +1,164 @@
 from django.contrib.auth import get_user_model
+from django.core.paginator import InvalidPage
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.views.generic import (
     DetailView, CreateView, UpdateView, DeleteView)
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.views.static import serve
 
-from .forms import UserForm, PostForm, CommentForm
+from .cache import get_users_version
+from .forms import UserForm, CommentForm
 from .models import Post, Category, User, Comment
 from .mixins import (
-    ListOfPostMixin, EditDeletePost, EditDeleteComment, RedirectMixin)
+    ConditionalGetMixin, ListOfPostMixin, EditDeletePost, EditDeleteComment,
+    PostFormMixin, RedirectMixin, COMMENTS_PAGINATOR_QUANTITY, FEED_ORDERING,
+    FROM_OLD_TO_NEW)
+from .paginators import KeysetPaginator
+from .search import get_backend
+from .storage import CONTENT_ADDRESSED_NAME
+
+# Файл с именем по хэшу содержимого никогда не меняется.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
 
 
 class BlogHome(ListOfPostMixin):
     """Отображение главной страницы."""
 
+    keyset_ordering = FEED_ORDERING
+
     def get_queryset(self):
-        """Получение списка постов с фильтрацией."""
-        return super().queryset.filter(
-            pub_date__lte=timezone.now(),
-            is_published=True,
-            category__is_published=True)
+        """Опубликованные посты из материализованной ленты."""
+        return self.get_feed()
 
 
-class PostDetail(DetailView):
+class SearchPosts(BlogHome):
+    """
+    Поиск по заголовкам и текстам постов.
+    Показываются те же посты, что и на главной, по релевантности.
+    """
+
+    template_name = 'blog/search.html'
+    keyset_only = True
+
+    def get_queryset(self):
+        self.search_query = self.request.GET.get('q', '').strip()
+        self.search_backend = get_backend()
+        self.keyset_ordering = self.search_backend.ordering
+        return self.search_backend.search(
+            super().get_queryset(), self.search_query)
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            search_query=self.search_query, **kwargs)
+
+
+class PostDetail(ConditionalGetMixin, DetailView):
     """Отображение подробного поста."""
 
     model = Post
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'post_id'
+    read_from_replica = True
+
+    queryset = Post.objects.select_related('category', 'location', 'author')
 
-    def dispatch(self, request, *args, **kwargs):
-        obj = get_object_or_404(Post, pk=kwargs['post_id'])
+    def get_validators(self):
+        """
+        Валидаторы — из поста, загруженного для страницы: время
+        изменения поста (учитывает и комментарии), категории и места;
+        автор и комментаторы — по общей версии пользователей в кэше.
+        """
+        post = self.object = self.get_object()
+        times = (
+            post.updated_at, post.category.updated_at,
+            post.location and post.location.updated_at,
+        )
+        return max(filter(None, times)), (
+            *times, post.comment_count, get_users_version())
+
+    def has_csrf_form(self):
+        """Форма комментария — только для вошедших."""
+        return self.request.user.is_authenticated
+
+    def get_object(self, queryset=None):
+        """
+        Получение поста одним запросом вместе со связанными объектами.
+        Неопубликованный пост доступен только автору.
+        Пост загружается один раз — ещё для валидаторов.
+        """
+        if getattr(self, 'object', None) is not None:
+            return self.object
+        obj = super().get_object(queryset)
         if ((
                 not obj.is_published or not obj.category.is_published
                 or obj.pub_date > timezone.now())
-                and obj.author != request.user):
+                and obj.author_id != self.request.user.pk):
             raise Http404('Страница не найдена')
-        return super().dispatch(request, *args, **kwargs)
+        return obj
 
     def get_context_data(self, **kwargs):
         """Добавление формы и модели комментариев."""
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = (
-            self.object.comments.select_related('author'))
+        context['comments'] = self.get_comments_page()
         return context
 
+    def get_comments_page(self):
+        """Порция комментариев после курсора ?after=, от старых к новым."""
+        paginator = KeysetPaginator(
+            self.object.comments.select_related('author'),
+            COMMENTS_PAGINATOR_QUANTITY,
+            FROM_OLD_TO_NEW)
+        try:
+            return paginator.page(after=self.request.GET.get('after'))
+        except InvalidPage as error:
+            raise Http404(f'Некорректная страница: {error}')
+
+
+class PostComments(PostDetail):
+    """Следующая порция комментариев к посту в виде HTML-фрагмента."""
+
+    template_name = 'includes/comment_list.html'
+
+    def has_csrf_form(self):
+        return False
+
 
 class CategoryPosts(ListOfPostMixin):
     """Отображение списка постов по категории."""
 
     template_name = 'blog/category.html'
+    keyset_ordering = FEED_ORDERING
 
-    def get_context_data(self, **kwargs):
-        """Добавление модели категории в контекст шаблона."""
-        context = super().get_context_data(**kwargs)
-        context['category'] = get_object_or_404(
+    def get_feed_object(self):
+        return get_object_or_404(
             Category,
             slug=self.kwargs['category_slug'],
             is_published=True)
+
+    def get_context_data(self, **kwargs):
+        """Добавление модели категории в контекст шаблона."""
+        context = super().get_context_data(**kwargs)
+        context['category'] = self.feed_object
         return context
 
+    def get_feed_filters(self):
+        return {'category__slug': self.kwargs['category_slug']}
+
     def get_queryset(self):
-        """Определяем категорию по слагу и возвращаем список постов."""
-        return super().queryset.filter(
-            category__slug=self.kwargs['category_slug'],
-            is_published=True,
-            pub_date__lte=timezone.now())
+        """Посты категории из материализованной ленты."""
+        return self.get_feed()
 
 
 class Profile(ListOfPostMixin):
     """Отображение списка постов в профиле."""
 
     template_name = 'blog/profile.html'
+    # Состав ленты зависит от того, кто её смотрит (автор видит
+    # и скрытые посты), поэтому число постов не кэшируется.
+    count_pages = False
 
     def get_queryset(self):
         """
@@ -88,12 +173,21 @@ class Profile(ListOfPostMixin):
             return posts
         return posts.filter(is_published=True)
 
+    def get_last_published(self):
+        return Post.objects.filter(
+            author__username=self.kwargs['username'],
+            pub_date__lte=timezone.now(),
+        ).order_by('-pub_date').values_list('pub_date', flat=True).first()
+
+    def get_feed_object(self):
+        return get_object_or_404(
+            get_user_model(), username=self.kwargs['username']
+        )
+
     def get_context_data(self, **kwargs):
         """Добавление объекта профиля в контекст."""
         context = super().get_context_data(**kwargs)
-        context['profile'] = get_object_or_404(
-            get_user_model(), username=self.kwargs['username']
-        )
+        context['profile'] = self.feed_object
         return context
 
 
@@ -108,10 +202,9 @@ class EditProfile(RedirectMixin, UpdateView):
         return self.request.user
 
 
-class CreatePost(RedirectMixin, CreateView):
+class CreatePost(PostFormMixin, RedirectMixin, CreateView):
     """Создание поста."""
 
-    form_class = PostForm
     template_name = 'blog/create.html'
 
     def form_valid(self, form):
@@ -123,11 +216,9 @@ class CreatePost(RedirectMixin, CreateView):
         return super().form_valid(form)
 
 
-class EditPost(EditDeletePost, UpdateView):
+class EditPost(PostFormMixin, EditDeletePost, UpdateView):
     """Редактирование поста."""
 
-    form_class = PostForm
-
 
 class DeletePost(EditDeletePost, DeleteView):
     """Удаление поста."""
@@ -173,3 +264,15 @@ class DeleteComment(EditDeleteComment, DeleteView):
     """Удаление комментария."""
 
     pass
+
+
+def serve_media(request, path, document_root=None):
+    """
+    Раздача загруженных файлов в режиме отладки.
+    Файлам с именем по хэшу содержимого ставится кэширование на год;
+    в бою тот же заголовок для них выставляет веб-сервер.
+    """
+    response = serve(request, path, document_root=document_root)
+    if CONTENT_ADDRESSED_NAME.search(path):
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
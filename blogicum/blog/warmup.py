@@ -0,0 +1,44 @@
+import gc
+import logging
+import time
+from pathlib import Path
+
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+
+logger = logging.getLogger('blog.warmup')
+
+
+def warm_up_templates(engine_name='django'):
+    """
+    Компиляция всех шаблонов из каталогов DIRS заранее, до первого
+    запроса. С кэширующим загрузчиком скомпилированные шаблоны
+    остаются в памяти процесса; без него прогрев бесполезен.
+    Возвращает число загруженных шаблонов.
+    """
+    engine = engines[engine_name].engine
+    if not any(isinstance(loader, CachedLoader)
+               for loader in engine.template_loaders):
+        return 0
+    start = time.perf_counter()
+    names = sorted({
+        path.relative_to(directory).as_posix()
+        for directory in map(Path, engine.dirs)
+        for path in directory.rglob('*.html')
+    })
+    for name in names:
+        engine.get_template(name)
+    logger.info('Templates warmed up: %d in %.0f ms', len(names),
+                (time.perf_counter() - start) * 1000)
+    return len(names)
+
+
+def prepare_for_fork():
+    """
+    Подготовка процесса перед запуском рабочих процессов
+    (gunicorn --preload): шаблоны компилируются один раз,
+    а gc.freeze() убирает созданные объекты из обхода сборщика
+    мусора, чтобы он не копировал общие страницы памяти.
+    """
+    warm_up_templates()
+    gc.freeze()
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -47,13 +50,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.middleware.ReplicaRoutingMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
@@ -68,12 +74,30 @@ STATICFILES_DIRS = [
 ]
 
 
+# Кэширующий загрузчик разбирает каждый шаблон один раз на процесс.
+# По умолчанию он включён без DEBUG, переменная окружения
+# BLOGICUM_TEMPLATE_CACHE (1 или 0) включает или выключает его явно.
+# Без кэша шаблоны перечитываются с диска при каждой отрисовке,
+# зато правки видны без перезапуска сервера.
+# wsgi.py заранее компилирует шаблоны из TEMPLATES_DIR (blog.warmup).
+
+TEMPLATE_CACHE = os.getenv(
+    'BLOGICUM_TEMPLATE_CACHE', '0' if DEBUG else '1') == '1'
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': (
+                [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)]
+                if TEMPLATE_CACHE else TEMPLATE_LOADERS
+            ),
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -89,11 +113,125 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
+# Профиль выбирается переменной окружения BLOGICUM_DB_PROFILE:
+# default — настройки SQLite по умолчанию,
+# production — постоянные соединения, WAL (запись комментариев
+# не блокирует чтение лент), ожидание блокировки вместо
+# «database is locked» и отображение файла базы в память.
+# PRAGMAS применяются к каждому новому соединению (blog.signals).
+
+DATABASE_PROFILES = {
+    'default': {
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {},
+        'PRAGMAS': {},
+    },
+    'production': {
+        'CONN_MAX_AGE': 600,
+        # Сколько секунд ждать снятия блокировки записи (busy timeout).
+        'OPTIONS': {'timeout': 20},
+        'PRAGMAS': {
+            'journal_mode': 'WAL',
+            # В режиме WAL не теряет целостность при сбое,
+            # но не ждёт записи на диск при каждой фиксации.
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            # Отрицательное значение — размер в КиБ, а не в страницах.
+            'cache_size': -20000,
+            'temp_store': 'MEMORY',
+        },
+    },
+}
+
+DATABASE_PROFILE = DATABASE_PROFILES[
+    os.getenv('BLOGICUM_DB_PROFILE', 'default')]
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': DATABASE_PROFILE['CONN_MAX_AGE'],
+        'OPTIONS': DATABASE_PROFILE['OPTIONS'],
+    }
+}
+
+SQLITE_PRAGMAS = DATABASE_PROFILE['PRAGMAS']
+
+# Реплики только для чтения: BLOGICUM_DB_REPLICAS — пути к копиям
+# базы через запятую (копии поддерживает внешняя репликация, локально
+# достаточно скопировать файл). С них читают ленты и страница поста,
+# кроме клиентов, которые писали в базу последние REPLICA_PIN_SECONDS.
+
+REPLICA_NAMES = [
+    name for name in os.getenv('BLOGICUM_DB_REPLICAS', '').split(',')
+    if name
+]
+
+DATABASE_REPLICAS = [
+    f'replica_{number}' for number in range(len(REPLICA_NAMES))
+]
+
+DATABASES.update({
+    alias: {**DATABASES['default'], 'NAME': name, 'TEST': {
+        'MIRROR': 'default'}}
+    for alias, name in zip(DATABASE_REPLICAS, REPLICA_NAMES)
+})
+
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Бэкенд выбирается переменной окружения BLOGICUM_CACHE:
+# locmem (по умолчанию), file, memcached (нужен пакет pymemcache)
+# или redis (любой сервер с протоколом Redis, нужен django-redis);
+# пакеты — в requirements-cache.txt.
+# Адрес сервера или каталог — BLOGICUM_CACHE_LOCATION.
+# Сброс кэша — это запись новых версий в кэш, а пересчёт идёт
+# под блокировкой cache.add. Если процессов больше одного
+# (несколько рабочих процессов, run_blog_jobs,
+# run_publication_scheduler), нужен общий кэш с атомарным add:
+# memcached или redis. locmem у каждого процесса свой, а add
+# в file не атомарен, поэтому без DEBUG они не допускаются.
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blogicum',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': '127.0.0.1:11211',
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+
+CACHE_BACKEND_NAME = os.getenv('BLOGICUM_CACHE', 'locmem')
+CACHE_BACKEND = CACHE_BACKENDS[CACHE_BACKEND_NAME]
+
+if not DEBUG and CACHE_BACKEND_NAME in ('locmem', 'file'):
+    raise ImproperlyConfigured(
+        f'Кэш {CACHE_BACKEND_NAME} не общий для процессов:'
+        ' задайте BLOGICUM_CACHE=memcached или redis.')
+
+# Обёртка учитывает время обращений к кэшу в Server-Timing.
+CACHES = {
+    'default': {
+        'BACKEND': 'blog.timing.TimedCache',
+        'TIMED_BACKEND': CACHE_BACKEND['BACKEND'],
+        'LOCATION': os.getenv(
+            'BLOGICUM_CACHE_LOCATION', CACHE_BACKEND['LOCATION']),
+        'KEY_PREFIX': 'blogicum',
+        'TIMEOUT': 300,
     }
 }
 
@@ -117,6 +255,68 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Query budget
+# Сколько запросов к базе может выполнить одна страница.
+# В продакшене можно включить выборочно: ENABLED = True, SAMPLE_RATE < 1.
+
+QUERY_BUDGET = {
+    'ENABLED': DEBUG,
+    'SAMPLE_RATE': 1.0,
+    'DEFAULT': 15,
+    'VIEWS': {
+        # Для лент — включая запрос валидаторов условного GET
+        # (ETag, Last-Modified); пост их берёт из уже загруженного.
+        'blog:index': 6,
+        'blog:search': 6,
+        'blog:category_posts': 7,
+        'blog:profile': 7,
+        'blog:post_detail': 5,
+        'blog:post_comments': 5,
+        # Сохранение поста с новым изображением идёт в транзакции.
+        'blog:create_post': 16,
+        'blog:edit_post': 16,
+    },
+    'N_PLUS_ONE_THRESHOLD': 5,
+    'RAISE': False,
+}
+
+
+# Background tasks
+# Режим BLOGICUM_TASKS_MODE: thread — пул потоков в процессе сайта,
+# worker — только отдельный процесс manage.py run_blog_jobs,
+# sync — сразу в запросе (для отладки и тестов).
+
+BLOG_TASKS = {
+    'MODE': os.getenv('BLOGICUM_TASKS_MODE', 'thread'),
+    'WORKERS': 2,
+    'MAX_ATTEMPTS': 3,
+    # Пауза перед повтором, умножается на номер попытки.
+    'RETRY_DELAY': 30,
+    # Через сколько секунд задача в работе считается зависшей.
+    'TIMEOUT': 300,
+}
+
+
+# Logging
+# https://docs.djangoproject.com/en/3.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'blog': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
 
@@ -155,6 +355,21 @@ LOGIN_REDIRECT_URL = 'blog:index'
 
 LOGIN_URL = 'login'
 
+# Изображения постов хранятся как media/posts/ab/cd/<sha256>.<ext>
+# и не меняются: веб-сервер может отдавать этот каталог
+# с Cache-Control: public, max-age=31536000, immutable.
 MEDIA_ROOT = BASE_DIR / 'media/'
 
 MEDIA_URL = '/media/'
+
+# Загрузки пишутся потоком во временный файл, а не в память.
+FILE_UPLOAD_HANDLERS = ['blog.uploads.LimitedUploadHandler']
+
+# Ограничения изображений постов: размер файла в байтах,
+# наибольшая сторона и число пикселей — защита памяти обработчиков
+# от «бомб», которые занимают гигабайты после распаковки.
+IMAGE_UPLOAD = {
+    'MAX_SIZE': 10 * 1024 * 1024,
+    'MAX_SIDE': 8000,
+    'MAX_PIXELS': 40_000_000,
+}
@@ -5,6 +5,8 @@ from django.contrib.auth.forms import UserCreationForm
 from django.urls import path, include, reverse_lazy
 from django.views.generic import CreateView
 
+from blog.views import serve_media
+
 from . import settings
 
 urlpatterns = [
@@ -28,6 +30,7 @@ if settings.DEBUG:
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
 
     urlpatterns += static(settings.MEDIA_URL,
+                          view=serve_media,
                           document_root=settings.MEDIA_ROOT)
 
 handler403 = 'pages.views.csrf_failure'
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
 application = get_wsgi_application()
+
+# Импорт после настройки Django: модуль обращается к settings.
+from blog.warmup import prepare_for_fork  # noqa: E402
+
+# Шаблоны компилируются до запуска рабочих процессов и делятся
+# ими через copy-on-write (с gunicorn --preload), а первый запрос
+# после перезапуска не платит за их разбор.
+prepare_for_fork()
@@ -19,6 +19,7 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -41,6 +42,24 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def enforce_query_budget(settings):
+    settings.QUERY_BUDGET = {
+        **settings.QUERY_BUDGET, 'ENABLED': True, 'RAISE': True}
+
+
+@pytest.fixture(autouse=True)
+def run_tasks_synchronously(settings):
+    settings.BLOG_TASKS = {**settings.BLOG_TASKS, 'MODE': 'sync'}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """База очищается между тестами без сигналов — кэш тоже чистим."""
+    cache.clear()
+    yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -363,7 +382,12 @@ def cleanup(request):
                     filename.endswith(".jpg")
                     or filename.endswith(".gif")
                     or filename.endswith(".png")
+                    or filename.endswith(".webp")
             ):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
                     os.remove(file_path)
+
+    for root, dirs, files in os.walk(image_dir, topdown=False):
+        if root != str(image_dir) and not os.listdir(root):
+            os.rmdir(root)
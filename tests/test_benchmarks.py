@@ -0,0 +1,51 @@
+import pytest
+from django.core.management import call_command
+
+from benchmarks.scenarios import run
+from blog.models import Category, Comment, Location, Post, User
+
+pytestmark = [pytest.mark.django_db]
+
+
+def generate(**options):
+    call_command(
+        'generate_blog_data', '--now=2026-01-01T12:00:00', users=5,
+        categories=3, locations=2, posts=40, comments=60, batch_size=25,
+        **options)
+
+
+def test_generate_blog_data():
+    generate(hot_comments=15)
+    assert (
+        User.objects.count(), Category.objects.count(),
+        Location.objects.count(), Post.objects.count(),
+        Comment.objects.count(),
+    ) == (5, 3, 2, 40, 75)
+    assert Post.objects.filter(comment_count__gte=15).exists(), (
+        'Убедитесь, что счётчики комментариев пересчитываются.'
+    )
+    fields = ('title', 'text', 'pub_date', 'is_published')
+    posts = list(Post.objects.order_by('pk').values_list(*fields))
+    Post.objects.all().delete()
+    User.objects.all().delete()
+    Category.objects.all().delete()
+    Location.objects.all().delete()
+    generate(hot_comments=15)
+    assert list(
+        Post.objects.order_by('pk').values_list(*fields)
+    ) == posts, (
+        'Убедитесь, что данные одинаковы при одинаковых seed и now.'
+    )
+
+
+def test_benchmark_smoke():
+    generate(hot_comments=15)
+    results = run(repeat=3, warmup=0)
+    assert set(results) == {
+        'index', 'index_deep_page', 'index_deep_cursor', 'category_posts',
+        'profile', 'post_detail', 'add_comment',
+    }
+    for name, result in results.items():
+        assert result['requests'] == 3, name
+        assert result['p50_ms'] <= result['p99_ms'] <= result['max_ms']
+        assert result['queries'] > 0
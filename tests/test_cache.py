@@ -0,0 +1,137 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from blog.cache import FEED_PAGE_TIMEOUT, feed_page_timeout, get_or_compute
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_post_card_cache_invalidation(
+        mixer, user_client, post_with_published_location):
+    post = post_with_published_location
+    assert post.category.title in user_client.get('/').content.decode()
+
+    post.category.title = 'Новое название категории'
+    post.category.save()
+    content = user_client.get('/').content.decode()
+    assert 'Новое название категории' in content, (
+        'Убедитесь, что закэшированная карточка поста обновляется'
+        ' при изменении категории.'
+    )
+
+    post.author.username = 'renamed_author'
+    post.author.save()
+    mixer.blend(Comment, post=post)
+    content = user_client.get('/').content.decode()
+    assert '@renamed_author' in content, (
+        'Убедитесь, что закэшированная карточка поста обновляется'
+        ' при изменении автора.'
+    )
+    assert 'Комментарии (1)' in content, (
+        'Убедитесь, что закэшированная карточка поста обновляется'
+        ' при добавлении комментария.'
+    )
+
+
+def test_anonymous_feed_page_cached(
+        mixer, unlogged_client, django_assert_num_queries,
+        post_with_published_location):
+    unlogged_client.get('/')
+    with django_assert_num_queries(0):
+        cached = unlogged_client.get('/')
+    assert post_with_published_location.title in cached.content.decode(), (
+        'Убедитесь, что анонимным пользователям отдаётся закэшированная'
+        ' страница ленты.'
+    )
+
+    new_post = mixer.blend(
+        Post, is_published=True,
+        category=post_with_published_location.category,
+        pub_date=timezone.now() - timedelta(minutes=1))
+    assert new_post.title in unlogged_client.get('/').content.decode(), (
+        'Убедитесь, что кэш страниц лент сбрасывается при создании поста.'
+    )
+
+
+def test_feed_page_timeout_capped_by_next_publication(
+        mixer, post_with_published_location):
+    assert feed_page_timeout() == FEED_PAGE_TIMEOUT
+    mixer.blend(
+        Post, is_published=True,
+        pub_date=timezone.now() + timedelta(seconds=30))
+    assert feed_page_timeout() <= 30, (
+        'Убедитесь, что страница ленты кэшируется не дольше, чем до'
+        ' ближайшей отложенной публикации.'
+    )
+
+
+def test_get_or_compute_single_recompute():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return 'value'
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(
+            lambda _: get_or_compute('stampede', compute, 60), range(8)))
+    assert results == ['value'] * 8
+    assert len(calls) == 1, (
+        'Убедитесь, что при одновременных запросах отсутствующее значение'
+        ' вычисляется только один раз.'
+    )
+
+
+def test_get_or_compute_serves_stale_while_recomputing():
+    get_or_compute('stale', lambda: 'old', 60)
+    value, _, delta = cache.get('stale')
+    cache.set('stale', (value, time.time() - 1, delta))
+    cache.add('stale:lock', 1)
+    assert get_or_compute('stale', lambda: 'new', 60) == 'old', (
+        'Убедитесь, что пока значение пересчитывается другим процессом,'
+        ' отдаётся прежнее.'
+    )
+    cache.delete('stale:lock')
+    assert get_or_compute('stale', lambda: 'new', 60) == 'new'
+
+
+def test_get_or_compute_waiter_takes_over_released_lock():
+    cache.add('orphan:lock', 'other', 60)
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(
+            get_or_compute, 'orphan', lambda: 'value', 60)
+        time.sleep(0.2)
+        # Держатель блокировки упал, не сохранив значение.
+        cache.delete('orphan:lock')
+        assert future.result() == 'value'
+    assert time.time() - started < 1, (
+        'Убедитесь, что ожидающие забирают освободившуюся блокировку,'
+        ' а не ждут до конца её срока.'
+    )
+
+
+def test_get_or_compute_keeps_foreign_lock():
+    def compute():
+        # Наша блокировка истекла, и её взял другой процесс.
+        cache.set('foreign:lock', 'other', 60)
+        return 'value'
+
+    assert get_or_compute('foreign', compute, 60) == 'value'
+    assert cache.get('foreign:lock') == 'other', (
+        'Убедитесь, что снимается только своя блокировка.'
+    )
+
+
+def test_get_or_compute_skips_uncacheable():
+    assert get_or_compute(
+        'uncacheable', lambda: 'error', 60,
+        cacheable=lambda value: value != 'error') == 'error'
+    assert cache.get('uncacheable') is None
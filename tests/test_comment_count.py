@@ -0,0 +1,61 @@
+import pytest
+from django.core.management import call_command
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comment_count_follows_comments(
+        mixer, user, user_client, post_with_published_location):
+    post = post_with_published_location
+    assert post.comment_count == 0
+
+    user_client.post(f'/posts/{post.pk}/comment/', {'text': 'Текст'})
+    mixer.cycle(2).blend(Comment, post=post)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        'Убедитесь, что при добавлении комментария увеличивается счётчик'
+        ' комментариев поста.'
+    )
+
+    comment = Comment.objects.filter(author=user).get()
+    user_client.post(
+        f'/posts/{post.pk}/delete_comment/{comment.pk}/')
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        'Убедитесь, что при удалении комментария уменьшается счётчик'
+        ' комментариев поста.'
+    )
+
+    Comment.objects.filter(post=post).delete()
+    post.refresh_from_db()
+    assert post.comment_count == 0
+
+
+def test_recount_comments_repairs_counters(
+        mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend(Comment, post=post)
+    Post.objects.update(comment_count=42)
+
+    call_command('recount_comments', batch_size=1)
+
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        'Убедитесь, что команда recount_comments восстанавливает'
+        ' счётчики комментариев.'
+    )
+
+
+@pytest.mark.parametrize('comments', [2, 20])
+def test_post_delete_skips_counter_updates(
+        mixer, post_with_published_location, django_assert_num_queries,
+        comments):
+    post = post_with_published_location
+    mixer.cycle(comments).blend(Comment, post=post)
+    post = Post.objects.get(pk=post.pk)
+    # Выборка комментариев, удаление их, записи ленты и поста —
+    # без обновления счётчика на каждый комментарий.
+    with django_assert_num_queries(4):
+        post.delete()
@@ -0,0 +1,45 @@
+from http import HTTPStatus
+
+import pytest
+
+from blog.mixins import COMMENTS_PAGINATOR_QUANTITY
+from blog.models import Comment
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_comments_paginated(
+        mixer, user_client, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(COMMENTS_PAGINATOR_QUANTITY + 5).blend(
+        Comment, post=post)
+
+    response = user_client.get(f'/posts/{post.pk}/')
+    page = response.context['comments']
+    assert list(page) == comments[:COMMENTS_PAGINATOR_QUANTITY], (
+        'Убедитесь, что на странице поста выводится ограниченное число'
+        ' первых комментариев.'
+    )
+    assert page.has_next()
+
+    fragment = user_client.get(
+        f'/posts/{post.pk}/comments/', {'after': page.next_cursor})
+    assert fragment.status_code == HTTPStatus.OK
+    assert list(fragment.context['comments']) == (
+        comments[COMMENTS_PAGINATOR_QUANTITY:])
+    content = fragment.content.decode('utf-8')
+    assert '<html' not in content, (
+        'Убедитесь, что следующая порция комментариев отдаётся'
+        ' HTML-фрагментом без базового шаблона.'
+    )
+    assert all(f'comment_{c.pk}"' in content for c in comments[-5:])
+
+
+def test_comments_fragment_of_hidden_post(
+        mixer, another_user_client, future_posts):
+    post = future_posts[0]
+    mixer.blend(Comment, post=post)
+    response = another_user_client.get(f'/posts/{post.pk}/comments/')
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        'Убедитесь, что комментарии к недоступному посту не отдаются.'
+    )
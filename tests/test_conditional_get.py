@@ -0,0 +1,111 @@
+from http import HTTPStatus
+
+import pytest
+
+pytestmark = [pytest.mark.django_db]
+
+
+def revalidate(client, url, response):
+    return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+
+def test_post_detail_not_modified(
+        mixer, user, user_client, another_user_client,
+        django_assert_max_num_queries, post_with_published_location):
+    post = post_with_published_location
+    url = f'/posts/{post.pk}/'
+    response = user_client.get(url)
+    assert response['ETag'] and response['Last-Modified'], (
+        'Убедитесь, что страница поста отдаёт ETag и Last-Modified.'
+    )
+    with django_assert_max_num_queries(3):
+        repeated = revalidate(user_client, url, response)
+    assert repeated.status_code == HTTPStatus.NOT_MODIFIED, (
+        'Убедитесь, что неизменённая страница поста отдаётся'
+        ' ответом 304 без отрисовки.'
+    )
+    assert user_client.get(
+        url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+    ).status_code == HTTPStatus.NOT_MODIFIED
+
+    other = another_user_client.get(url)
+    assert other['ETag'] != response['ETag'], (
+        'Убедитесь, что ETag зависит от пользователя.'
+    )
+
+    comment = mixer.blend('blog.Comment', post=post, author=user)
+    assert revalidate(user_client, url, response).status_code == (
+        HTTPStatus.OK), (
+        'Убедитесь, что новый комментарий меняет ETag страницы поста.'
+    )
+    response = user_client.get(url)
+    comment.text = 'Исправленный комментарий'
+    comment.save()
+    assert revalidate(user_client, url, response).status_code == (
+        HTTPStatus.OK)
+
+
+def test_post_detail_changes_with_commenter(
+        mixer, another_user, user_client, post_with_published_location):
+    post = post_with_published_location
+    mixer.blend('blog.Comment', post=post, author=another_user)
+    url = f'/posts/{post.pk}/'
+    response = user_client.get(url)
+    another_user.username = 'renamed'
+    another_user.save()
+    repeated = revalidate(user_client, url, response)
+    assert repeated.status_code == HTTPStatus.OK, (
+        'Убедитесь, что изменение автора комментария меняет ETag'
+        ' страницы поста.'
+    )
+    assert '@renamed' in repeated.content.decode()
+
+
+@pytest.mark.parametrize('url', [
+    '/category/{category}/', '/profile/{username}/',
+])
+def test_feed_not_modified(
+        user, user_client, post_with_published_location, url):
+    post = post_with_published_location
+    url = url.format(category=post.category.slug, username=user.username)
+    response = user_client.get(url)
+    assert response['ETag'], 'Убедитесь, что страница ленты отдаёт ETag.'
+    assert revalidate(user_client, url, response).status_code == (
+        HTTPStatus.NOT_MODIFIED)
+
+    post.title = 'Новый заголовок'
+    post.save()
+    assert revalidate(user_client, url, response).status_code == (
+        HTTPStatus.OK), (
+        'Убедитесь, что изменение поста меняет ETag ленты.'
+    )
+
+
+def test_hidden_page_not_answered_with_not_modified(
+        another_user_client, post_with_published_location):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    for url in (f'/posts/{post.pk}/', '/category/nope/'):
+        response = another_user_client.get(
+            url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Убедитесь, что скрытые и несуществующие страницы отвечают'
+            ' 404, а не 304.'
+        )
+
+
+@pytest.mark.parametrize('url', ['/', '/category/{category}/'])
+def test_anonymous_feed_without_csrf_cookie(
+        client, post_with_published_location, url):
+    url = url.format(category=post_with_published_location.category.slug)
+    response = client.get(url)
+    assert 'csrftoken' not in response.cookies, (
+        'Убедитесь, что ленты без форм не выдают анонимам cookie CSRF:'
+        ' с ним ответ не попадёт в общие кэши.'
+    )
+    client.cookies.clear()
+    assert revalidate(client, url, response).status_code == (
+        HTTPStatus.NOT_MODIFIED), (
+        'Убедитесь, что клиент без cookie получает 304.'
+    )
@@ -0,0 +1,29 @@
+import pytest
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+
+@pytest.mark.django_db
+def test_production_sqlite_profile(settings, tmp_path):
+    profile = settings.DATABASE_PROFILES['production']
+    settings.SQLITE_PRAGMAS = profile['PRAGMAS']
+    database = DatabaseWrapper({
+        **connection.settings_dict,
+        'NAME': str(tmp_path / 'db.sqlite3'),
+        'CONN_MAX_AGE': profile['CONN_MAX_AGE'],
+        'OPTIONS': profile['OPTIONS'],
+    })
+    try:
+        with database.cursor() as cursor:
+            pragmas = {}
+            for name in ('journal_mode', 'synchronous', 'busy_timeout'):
+                cursor.execute(f'PRAGMA {name}')
+                pragmas[name] = cursor.fetchone()[0]
+    finally:
+        database.close()
+    assert pragmas == {
+        'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 20000,
+    }, (
+        'Убедитесь, что профиль production включает WAL, synchronous=NORMAL'
+        ' и ожидание блокировки для каждого соединения.'
+    )
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import FeedEntry
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def post(mixer, user, published_category):
+    return mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1))
+
+
+def feed_ids():
+    return set(FeedEntry.objects.values_list('post_id', flat=True))
+
+
+def index_ids(client):
+    response = client.get('/')
+    return {post.pk for post in response.context['page_obj']}
+
+
+def test_feed_follows_post(post):
+    assert feed_ids() == {post.pk}, (
+        'Убедитесь, что опубликованный пост попадает в ленту.'
+    )
+    post.is_published = False
+    post.save()
+    assert not feed_ids(), (
+        'Убедитесь, что снятый с публикации пост убирается из ленты.'
+    )
+    post.is_published = True
+    post.save()
+    assert feed_ids() == {post.pk}
+
+
+def test_feed_follows_category(post):
+    category = post.category
+    category.is_published = False
+    category.save()
+    assert not feed_ids(), (
+        'Убедитесь, что посты скрытой категории убираются из ленты.'
+    )
+    category.is_published = True
+    category.save()
+    assert feed_ids() == {post.pk}
+
+
+def test_scheduled_post_appears(user_client, post):
+    post.pub_date = timezone.now() + timedelta(hours=1)
+    post.save()
+    assert feed_ids() == {post.pk}
+    assert post.pk not in index_ids(user_client), (
+        'Убедитесь, что отложенный пост не показывается до времени'
+        ' публикации.'
+    )
+    post.pub_date = timezone.now() - timedelta(minutes=1)
+    post.save()
+    assert post.pk in index_ids(user_client)
+
+
+def test_refresh_feed(post):
+    FeedEntry.objects.all().delete()
+    call_command('refresh_feed', batch_size=1)
+    assert feed_ids() == {post.pk}, (
+        'Убедитесь, что команда refresh_feed пересобирает ленту.'
+    )
+
+
+def test_refresh_feed_keeps_other_entries(monkeypatch, mixer, post):
+    other = mixer.blend(
+        'blog.Post', author=post.author, category=post.category,
+        is_published=True, pub_date=post.pub_date)
+    seen = []
+    bulk_create = FeedEntry.objects.bulk_create
+
+    def record(objs, *args, **kwargs):
+        seen.append(feed_ids())
+        return bulk_create(objs, *args, **kwargs)
+
+    monkeypatch.setattr(FeedEntry.objects, 'bulk_create', record)
+    call_command('refresh_feed', batch_size=1)
+    # При пересборке диапазона одного поста запись другого на месте.
+    assert {other.pk} in seen and {post.pk} in seen, (
+        'Убедитесь, что refresh_feed пересобирает ленту по диапазонам,'
+        ' не удаляя записи остальных постов.'
+    )
+    assert feed_ids() == {post.pk, other.pk}
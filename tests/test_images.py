@@ -0,0 +1,269 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog import tasks
+from blog.images import RENDITIONS, rendition_name
+from blog.models import Job, Post
+from blog.storage import CONTENT_ADDRESSED_NAME
+from blog.tasks import TASKS, enqueue, release_post_image
+from blog.views import serve_media
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_renditions_created(post_with_published_location):
+    image = post_with_published_location.image
+    for rendition in RENDITIONS:
+        for extension, image_format in (('jpg', 'JPEG'), ('webp', 'WEBP')):
+            name = rendition_name(image.name, rendition, extension)
+            assert image.storage.exists(name), (
+                'Убедитесь, что при загрузке изображения создаются'
+                f' его уменьшенные копии: нет файла `{name}`.'
+            )
+            with image.storage.open(name) as file:
+                assert Image.open(BytesIO(file.read())).format == (
+                    image_format)
+
+
+def test_feed_uses_renditions(user_client, post_with_published_location):
+    image = post_with_published_location.image
+    content = user_client.get('/').content.decode('utf-8')
+    card_url = image.storage.url(rendition_name(image.name, 'card', 'jpg'))
+    assert f'src="{card_url}"' in content, (
+        'Убедитесь, что в карточке поста выводится уменьшенная копия'
+        ' изображения, а не оригинал.'
+    )
+    assert 'type="image/webp"' in content and 'srcset=' in content
+
+
+def test_image_job_processed(post_with_published_location):
+    post = post_with_published_location
+    post.refresh_from_db()
+    assert post.image_size == '100x100', (
+        'Убедитесь, что фоновая задача сохраняет размеры изображения.'
+    )
+    job = Job.objects.get(name='process_post_image')
+    assert job.status == Job.DONE
+    assert job.payload == {'post_id': post.pk}
+
+
+def test_worker_mode_and_retry(
+        settings, monkeypatch, post_with_published_location):
+    settings.BLOG_TASKS = {
+        **settings.BLOG_TASKS, 'MODE': 'worker', 'RETRY_DELAY': 0}
+    calls = []
+
+    def flaky(post_id):
+        calls.append(post_id)
+        if len(calls) == 1:
+            raise OSError('Диск недоступен')
+
+    monkeypatch.setitem(TASKS, 'process_post_image', flaky)
+    job = enqueue('process_post_image', post_id=1)
+    assert not calls, (
+        'Убедитесь, что в режиме worker задача только ставится в очередь.'
+    )
+
+    call_command('run_blog_jobs', once=True)
+    job.refresh_from_db()
+    assert job.status == Job.PENDING and 'Диск недоступен' in job.last_error
+
+    call_command('run_blog_jobs', once=True)
+    job.refresh_from_db()
+    assert job.status == Job.DONE and job.attempts == 2, (
+        'Убедитесь, что упавшая задача выполняется повторно.'
+    )
+
+
+def test_exif_stripped(mixer, user, published_category):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Повёрнуто на 90°.
+    exif[0x010F] = 'Camera'
+    buffer = BytesIO()
+    Image.new('RGB', (120, 80)).save(buffer, 'JPEG', exif=exif)
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=ImageFile(buffer, name='exif.jpg'))
+
+    post.refresh_from_db()
+    with post.image.open() as file:
+        image = Image.open(BytesIO(file.read()))
+    assert not image.getexif(), (
+        'Убедитесь, что из загруженного изображения удаляются'
+        ' метаданные EXIF.'
+    )
+    assert image.size == (80, 120) and post.image_size == '80x120', (
+        'Убедитесь, что поворот из EXIF применяется к изображению.'
+    )
+
+
+def test_cleaned_copy_released_if_image_replaced(
+        settings, monkeypatch, mixer, user, published_category):
+    settings.BLOG_TASKS = {**settings.BLOG_TASKS, 'MODE': 'worker'}
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera'
+    buffer = BytesIO()
+    Image.new('RGB', (120, 80)).save(buffer, 'JPEG', exif=exif)
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=ImageFile(buffer, name='exif.jpg'))
+    replacement = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=make_image('orange')).image.name
+
+    def replace_image(*size):
+        # Автор заменил изображение, пока задача его обрабатывала.
+        Post.objects.filter(pk=post.pk).update(image=replacement)
+
+    released = []
+
+    def release(name):
+        released.append(name)
+        release_post_image(name)
+
+    original = post.image.name
+    monkeypatch.setattr(tasks, 'check_dimensions', replace_image)
+    monkeypatch.setattr(tasks, 'release_post_image', release)
+    TASKS['process_post_image'](post_id=post.pk)
+    post.refresh_from_db()
+    assert post.image.name == replacement
+    assert len(released) == 1 and released[0] not in (
+        original, replacement)
+    assert not post.image.storage.exists(released[0]), (
+        'Убедитесь, что очищенная копия заменённого изображения'
+        ' удаляется.'
+    )
+    assert not post.image.storage.exists(
+        rendition_name(released[0], 'card', 'jpg'))
+
+
+def make_image(color):
+    buffer = BytesIO()
+    Image.new('RGB', (50, 50), color).save(buffer, 'PNG')
+    return ImageFile(buffer, name='upload.png')
+
+
+def test_identical_uploads_share_file(
+        mixer, user, published_category, django_capture_on_commit_callbacks):
+    first, second = (
+        mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            image=make_image('red'))
+        for _ in range(2)
+    )
+    assert first.image.name == second.image.name, (
+        'Убедитесь, что одинаковые загрузки хранятся одним файлом.'
+    )
+    assert CONTENT_ADDRESSED_NAME.search(first.image.name)
+    storage = first.image.storage
+    name = first.image.name
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    assert storage.exists(name), (
+        'Убедитесь, что файл, на который ссылается другой пост,'
+        ' не удаляется.'
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    assert not storage.exists(name), (
+        'Убедитесь, что файл удаляется вместе с последним постом.'
+    )
+    assert not storage.exists(rendition_name(name, 'card', 'jpg'))
+
+
+def test_replaced_image_released(
+        mixer, user, published_category, django_capture_on_commit_callbacks):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=make_image('green'))
+    name = post.image.name
+    post.image = make_image('blue')
+    with django_capture_on_commit_callbacks(execute=True):
+        post.save()
+    assert post.image.name != name
+    assert not post.image.storage.exists(name), (
+        'Убедитесь, что заменённое изображение удаляется.'
+    )
+
+
+def test_release_keeps_file_referenced_meanwhile(
+        mixer, user, published_category):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=make_image('yellow'))
+    storage = post.image.storage
+    name = post.image.name
+    checks = iter([False, True])
+    # Между первой и второй проверкой на файл сослался новый пост.
+    assert not storage.delete_unreferenced(name, lambda: next(checks))
+    assert storage.exists(name), (
+        'Убедитесь, что файл, на который успели сослаться'
+        ' во время удаления, остаётся в хранилище.'
+    )
+
+
+def test_identical_upload_restores_released_file(
+        mixer, user, published_category, django_capture_on_commit_callbacks):
+    first = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=make_image('purple'))
+    storage = first.image.storage
+    name = first.image.name
+    with django_capture_on_commit_callbacks() as callbacks:
+        second = mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            image=make_image('purple'))
+        # Другой процесс удалил файл, не увидев ещё ссылку второго поста.
+        storage.delete(name)
+    for callback in callbacks:
+        callback()
+    assert second.image.name == name
+    assert storage.exists(name), (
+        'Убедитесь, что файл, удалённый до фиксации ссылки на него,'
+        ' записывается заново.'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_file_released_before_insert_restored(
+        monkeypatch, mixer, user, published_category):
+    first = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=make_image('cyan'))
+    storage = first.image.storage
+    name = first.image.name
+    save = type(storage)._save
+
+    def save_then_release(self, *args, **kwargs):
+        saved = save(self, *args, **kwargs)
+        # Другой процесс удалил файл до INSERT нового поста:
+        # ссылки на него он ещё не видел.
+        self.delete(saved)
+        return saved
+
+    monkeypatch.setattr(type(storage), '_save', save_then_release)
+    second = Post(
+        title='Заголовок', text='Текст', pub_date=first.pub_date,
+        author=user, category=published_category, image=make_image('cyan'))
+    second.save()
+    assert second.image.name == name
+    assert storage.exists(name), (
+        'Убедитесь, что файл, удалённый между сохранением файла'
+        ' и строки поста, записывается заново после фиксации.'
+    )
+
+
+def test_media_immutable_cache(rf, settings, post_with_published_location):
+    image = post_with_published_location.image
+    response = serve_media(
+        rf.get(image.url), image.name, document_root=settings.MEDIA_ROOT)
+    assert response.status_code == 200
+    assert 'immutable' in response['Cache-Control'], (
+        'Убедитесь, что файлы с именем по хэшу содержимого'
+        ' отдаются с Cache-Control: immutable.'
+    )
@@ -0,0 +1,52 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import RequestFactory
+
+from blog import views
+from blog.paginators import KeysetPaginator
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='EXPLAIN QUERY PLAN есть только в SQLite.'),
+]
+
+
+def get_query_plan(view_class, after=None, **kwargs):
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    view = view_class()
+    view.setup(request, **kwargs)
+    queryset = view.get_queryset()
+    if after:
+        paginator = KeysetPaginator(
+            queryset, view.paginate_by, view.keyset_ordering)
+        queryset = paginator.filter_after(queryset, after)
+    sql, params = queryset[:view.paginate_by].query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@pytest.mark.parametrize('after', [None, ('2024-01-01 00:00+00:00', 100)])
+@pytest.mark.parametrize(('view_class', 'kwargs', 'table', 'index'), [
+    (views.BlogHome, {}, 'blog_feedentry', 'feed_pub_date_idx'),
+    (views.CategoryPosts, {'category_slug': 'slug'},
+     'blog_feedentry', 'feed_category_pub_date_idx'),
+    (views.Profile, {'username': 'username'},
+     'blog_post', 'post_author_pub_date_idx'),
+])
+def test_feed_uses_index(view_class, kwargs, table, index, after):
+    plan = get_query_plan(view_class, after, **kwargs)
+    assert any(
+        table in step and index in step for step in plan
+    ), (
+        f'Убедитесь, что лента `{view_class.__name__}` читает посты'
+        f' по индексу `{index}`. План запроса: {plan}'
+    )
+    assert not any('TEMP B-TREE' in step for step in plan), (
+        f'Убедитесь, что лента `{view_class.__name__}` не сортирует посты'
+        f' во временном B-дереве. План запроса: {plan}'
+    )
@@ -0,0 +1,50 @@
+from http import HTTPStatus
+
+import pytest
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.mark.parametrize('url', ['/', '/profile/{username}/'])
+def test_keyset_pagination(
+        user, user_client, many_posts_with_published_locations, url):
+    url = url.format(username=user.username)
+    expected = sorted(
+        many_posts_with_published_locations,
+        key=lambda post: (post.pub_date, post.pk),
+        reverse=True,
+    )
+
+    first = user_client.get(url, {'after': ''})
+    assert first.status_code == HTTPStatus.OK
+    first_page = first.context['page_obj']
+    assert list(first_page) == expected[:N_PER_PAGE], (
+        'Убедитесь, что первая страница по курсору содержит самые новые'
+        ' публикации.'
+    )
+    assert first_page.has_next() and not first_page.has_previous()
+
+    second = user_client.get(url, {'after': first_page.next_cursor})
+    second_page = second.context['page_obj']
+    assert list(second_page) == expected[N_PER_PAGE:N_PER_PAGE * 2], (
+        'Убедитесь, что следующая страница продолжает ленту'
+        ' с места, на котором остановилась предыдущая.'
+    )
+    assert second_page.has_previous() and not second_page.has_next()
+    assert f'?before={second_page.previous_cursor}' in (
+        second.content.decode('utf-8'))
+
+    back = user_client.get(url, {'before': second_page.previous_cursor})
+    assert list(back.context['page_obj']) == expected[:N_PER_PAGE], (
+        'Убедитесь, что ссылка «назад» возвращает предыдущую страницу.'
+    )
+
+
+@pytest.mark.parametrize('cursor', ['###', 'bm90LWEtZGF0ZSx4'])
+def test_keyset_pagination_invalid_cursor(user_client, cursor):
+    response = user_client.get('/', {'after': cursor})
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        'Убедитесь, что при некорректном курсоре возвращается ошибка 404.'
+    )
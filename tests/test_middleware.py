@@ -0,0 +1,172 @@
+import logging
+import sqlite3
+
+import pytest
+from django.db import connection, connections
+from django.template import Context, Template
+from django.test.utils import CaptureQueriesContext
+
+from blog.middleware import (
+    REPLICA_PIN_COOKIE, QueryBudgetExceeded, QueryCollector)
+from blog.models import Post
+from blog.timing import Timings, activate, deactivate
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_query_budget_exceeded(settings, user_client, caplog):
+    settings.QUERY_BUDGET = {
+        **settings.QUERY_BUDGET,
+        'VIEWS': {**settings.QUERY_BUDGET['VIEWS'], 'blog:index': 1},
+    }
+    with pytest.raises(QueryBudgetExceeded):
+        user_client.get('/')
+    assert 'blog:index' in caplog.text, (
+        'Убедитесь, что превышение бюджета запросов попадает в лог'
+        ' с именем представления.'
+    )
+
+
+def test_query_budget_not_raising_in_production(
+        settings, user_client, caplog):
+    settings.QUERY_BUDGET = {
+        **settings.QUERY_BUDGET, 'DEFAULT': 0, 'VIEWS': {}, 'RAISE': False}
+    with caplog.at_level(logging.WARNING, logger='blog.queries'):
+        response = user_client.get('/')
+    assert response.status_code == 200
+    assert 'Query budget exceeded in blog:index' in caplog.text
+
+
+def test_query_collector_detects_repeated_queries(
+        mixer, post_with_published_location):
+    collector = QueryCollector()
+    with connection.execute_wrapper(collector):
+        for post in Post.objects.all():
+            list(Post.objects.filter(pk=post.pk))
+            list(Post.objects.filter(pk=post.pk + 1))
+        list(Post.objects.order_by('pk')[:1])
+        list(Post.objects.order_by('pk')[:1])
+    repeated = collector.repeated(threshold=2)
+    assert len(repeated) == 1, (
+        'Убедитесь, что один запрос с разными параметрами'
+        ' распознаётся как повторяющийся (N+1), а с одинаковыми — нет.'
+    )
+    assert collector.count == 5
+
+
+@pytest.mark.parametrize('url', ['/', '/pages/about/'])
+def test_server_timing_header(user_client, url, caplog):
+    with caplog.at_level(logging.INFO, logger='blog.timing'):
+        response = user_client.get(url)
+    phases = {
+        item.split(';')[0].strip()
+        for item in response['Server-Timing'].split(',')
+    }
+    assert {'db', 'template', 'cache', 'view', 'total'} <= phases, (
+        'Убедитесь, что ответ содержит заголовок Server-Timing'
+        ' с разбивкой по фазам.'
+    )
+    assert response.resolver_match.view_name in caplog.text
+
+
+def test_template_fragment_cache_timed():
+    timings = Timings()
+    token = activate(timings)
+    try:
+        Template(
+            '{% load cache %}{% cache 60 fragment %}текст{% endcache %}'
+        ).render(Context())
+    finally:
+        deactivate(token)
+    assert timings.phases['cache'] > 0, (
+        'Убедитесь, что обращения {% cache %} учитываются в фазе cache.'
+    )
+
+
+def test_no_server_timing_outside_apps(admin_client):
+    response = admin_client.get('/admin/')
+    assert 'Server-Timing' not in response
+
+
+REPLICA = 'replica_0'
+
+
+@pytest.fixture
+def replica(
+        settings, tmp_path, transactional_db, user_client,
+        post_with_published_location):
+    """
+    Настоящая вторая база: копия основной на момент вызова фикстуры.
+    Тест идёт без обёртывающей транзакции, иначе копия не увидит данных.
+    """
+    path = tmp_path / 'replica.sqlite3'
+    connections['default'].ensure_connection()
+    with sqlite3.connect(path) as target:
+        connections['default'].connection.backup(target)
+    target.close()
+    connections.databases[REPLICA] = {
+        **connections.databases['default'], 'NAME': str(path)}
+    connections.ensure_defaults(REPLICA)
+    connections.prepare_test_settings(REPLICA)
+    settings.DATABASE_REPLICAS = [REPLICA]
+    yield connections[REPLICA]
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.databases[REPLICA]
+
+
+def capture_queries(alias, client, url):
+    with CaptureQueriesContext(connections[alias]) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return [query['sql'] for query in queries]
+
+
+def test_feeds_read_from_replica(replica, user_client):
+    post = Post.objects.get()
+    # Копия отстаёт: изменение видно только в основной базе.
+    Post.objects.filter(pk=post.pk).update(title='Только в основной')
+    with CaptureQueriesContext(connections['default']) as primary:
+        replica_queries = capture_queries(REPLICA, user_client, '/')
+    assert any('blog_feedentry' in sql for sql in replica_queries), (
+        'Убедитесь, что ленты читают данные с реплики.'
+    )
+    assert not any('blog_' in query['sql'] for query in primary), (
+        'Убедитесь, что ленты не читают посты из основной базы.'
+    )
+    assert 'Только в основной' not in user_client.get('/').content.decode()
+    with CaptureQueriesContext(connections['default']) as primary:
+        replica_queries = capture_queries(
+            REPLICA, user_client, f'/posts/{post.pk}/edit/')
+    assert not replica_queries and any(
+        'blog_post' in query['sql'] for query in primary), (
+        'Убедитесь, что остальные представления читают с основной базы.'
+    )
+
+
+def test_replica_reads_cached_apart(replica, client, user_client):
+    post = Post.objects.get()
+    # Изменение сбрасывает версии, но до реплики ещё не дошло.
+    post.title = 'Только в основной'
+    post.save()
+    for reader in (client, user_client):
+        assert 'Только в основной' not in reader.get('/').content.decode()
+        reader.cookies[REPLICA_PIN_COOKIE] = '1'
+        assert 'Только в основной' in reader.get('/').content.decode(), (
+            'Убедитесь, что прочитанное с реплики кэшируется отдельно'
+            ' от прочитанного с основной базы.'
+        )
+
+
+def test_primary_pinned_after_write(replica, user_client):
+    post = Post.objects.get()
+    response = user_client.post(
+        f'/posts/{post.pk}/comment/', {'text': 'Комментарий'})
+    assert REPLICA_PIN_COOKIE in response.cookies
+    with CaptureQueriesContext(connections['default']) as primary:
+        replica_queries = capture_queries(
+            REPLICA, user_client, f'/posts/{post.pk}/')
+    assert not replica_queries and any(
+        'blog_comment' in query['sql'] for query in primary), (
+        'Убедитесь, что после записи клиент читает с основной базы.'
+    )
@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import views
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def posts(mixer, user, published_category, monkeypatch):
+    monkeypatch.setattr(views.BlogHome, 'paginate_by', 2)
+    monkeypatch.setattr(views.Profile, 'paginate_by', 2)
+    return mixer.cycle(40).blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1))
+
+
+def test_windowed_page_range(user_client, posts):
+    page = user_client.get('/', {'page': 10}).context['page_obj']
+    assert page.page_range == [1, '…', 8, 9, 10, 11, 12, '…', 20], (
+        'Убедитесь, что в пагинаторе выводятся только первая, последняя'
+        ' и соседние с текущей страницы.'
+    )
+
+
+def test_count_cached(user_client, posts):
+    user_client.get('/', {'page': 2})
+    with CaptureQueriesContext(connection) as queries:
+        page = user_client.get('/', {'page': 3}).context['page_obj']
+    assert page.paginator.num_pages == 20
+    assert not any('COUNT(' in query['sql'] for query in queries), (
+        'Убедитесь, что число постов в ленте берётся из кэша.'
+    )
+
+
+def test_has_next_mode(user, user_client, posts):
+    url = f'/profile/{user.username}/'
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.get(url, {'page': 20})
+    page = response.context['page_obj']
+    assert len(page) == 2 and page.has_previous() and not page.has_next()
+    assert not any('COUNT(' in query['sql'] for query in queries), (
+        'Убедитесь, что лента профиля не считает посты.'
+    )
+    assert user_client.get(url, {'page': 19}).context['page_obj'].has_next()
+    assert user_client.get(url, {'page': 21}).status_code == 404
+    assert user_client.get(url, {'page': 'last'}).status_code == 404
@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+import pytest
+
+from blog.models import Comment
+
+pytestmark = [pytest.mark.django_db]
+
+# Пост со связанными объектами и комментарии с авторами.
+POST_DETAIL_QUERIES = 2
+# Плюс сессия и пользователь.
+AUTHORISED_EXTRA_QUERIES = 2
+
+
+@pytest.mark.parametrize(('client_fixture', 'expected'), [
+    ('unlogged_client', POST_DETAIL_QUERIES),
+    ('another_user_client', POST_DETAIL_QUERIES + AUTHORISED_EXTRA_QUERIES),
+])
+def test_post_detail_query_count(
+        request, mixer, post_with_published_location,
+        django_assert_num_queries, client_fixture, expected):
+    client = request.getfixturevalue(client_fixture)
+    post = post_with_published_location
+    mixer.cycle(3).blend(Comment, post=post)
+    with django_assert_num_queries(expected):
+        response = client.get(f'/posts/{post.pk}/')
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_edit_post_query_count(
+        user_client, post_with_published_location,
+        django_assert_num_queries):
+    post = post_with_published_location
+    # Сессия, пользователь, пост и варианты категорий и местоположений.
+    with django_assert_num_queries(AUTHORISED_EXTRA_QUERIES + 3):
+        response = user_client.get(f'/posts/{post.pk}/edit/')
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_edit_comment_query_count(
+        mixer, user, user_client, post_with_published_location,
+        django_assert_num_queries):
+    post = post_with_published_location
+    comment = mixer.blend(Comment, post=post, author=user)
+    for url in (
+        f'/posts/{post.pk}/edit_comment/{comment.pk}',
+        f'/posts/{post.pk}/delete_comment/{comment.pk}/',
+    ):
+        with django_assert_num_queries(AUTHORISED_EXTRA_QUERIES + 1):
+            response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+
+
+def test_comment_of_another_post_not_found(
+        mixer, user, user_client, post_with_published_location,
+        post_of_another_author):
+    comment = mixer.blend(
+        Comment, post=post_with_published_location, author=user)
+    response = user_client.get(
+        f'/posts/{post_of_another_author.pk}/edit_comment/{comment.pk}')
+    assert response.status_code == HTTPStatus.NOT_FOUND, (
+        'Убедитесь, что комментарий нельзя открыть по адресу чужого поста.'
+    )
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from blog.models import Checkpoint
+from blog.scheduler import PublicationScheduler, post_became_visible
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def events():
+    received = []
+
+    def receiver(sender, instance, **kwargs):
+        received.append(instance.pk)
+
+    post_became_visible.connect(receiver)
+    yield received
+    post_became_visible.disconnect(receiver)
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category):
+    def make(pub_date, is_published=True):
+        return mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            is_published=is_published, pub_date=pub_date)
+
+    return make
+
+
+def move_checkpoint(delta):
+    Checkpoint.objects.filter(name='publications').update(
+        pub_date=timezone.now() + delta)
+
+
+def test_scheduled_posts_published(make_post, events):
+    now = timezone.now()
+    make_post(now - timedelta(days=1))
+    scheduler = PublicationScheduler(batch_size=2)
+    assert scheduler.publish_due() == 0, (
+        'Убедитесь, что при первом запуске планировщик не рассылает'
+        ' события для давних публикаций.'
+    )
+    scheduled = [make_post(now + timedelta(minutes=i)) for i in (1, 2, 3)]
+    make_post(now + timedelta(minutes=1), is_published=False)
+    scheduler.reload()
+    assert scheduler.next_publication() == scheduled[0].pub_date
+    assert 0 < scheduler.seconds_until_next(3600) <= 60
+
+    # Планировщик был остановлен и пропустил все три публикации.
+    move_checkpoint(-timedelta(hours=1))
+    for post in scheduled:
+        post.pub_date = now - timedelta(minutes=1)
+        post.save()
+    assert scheduler.publish_due() == 3
+    assert events == [post.pk for post in scheduled], (
+        'Убедитесь, что после перезапуска планировщик рассылает события'
+        ' для пропущенных публикаций, причём только для видимых постов.'
+    )
+    assert scheduler.publish_due() == 0, (
+        'Убедитесь, что событие о публикации рассылается один раз.'
+    )
+
+
+def test_publication_resets_feed_cache(client, make_post):
+    post = make_post(timezone.now() + timedelta(hours=1))
+    assert post not in client.get('/').context['page_obj']
+    call_command('run_publication_scheduler', once=True)
+    move_checkpoint(-timedelta(hours=2))
+    post.pub_date = timezone.now() - timedelta(minutes=1)
+    # Обновление в обход сигналов сохранения, как наступление времени.
+    type(post).objects.filter(pk=post.pk).update(pub_date=post.pub_date)
+    post.feed_entry.pub_date = post.pub_date
+    post.feed_entry.save()
+    call_command('run_publication_scheduler', once=True)
+    assert post in client.get('/').context['page_obj'], (
+        'Убедитесь, что по событию публикации сбрасывается кэш лент.'
+    )
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from blog.models import Post
+from blog.search import get_backend
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def posts(mixer, user, published_category):
+    def make(title, text, **kwargs):
+        fields = {
+            'is_published': True,
+            'pub_date': timezone.now() - timedelta(days=1),
+            **kwargs,
+        }
+        return mixer.blend(
+            'blog.Post', author=user, category=published_category,
+            title=title, text=text, **fields)
+
+    return {
+        'title': make('Путешествие на Байкал', 'Зимой озеро замерзает.'),
+        'text': make('Заметки', 'Летом ездили на Байкал и в горы.'),
+        'other': make('Рецепт', 'Пирог с яблоками.'),
+        'hidden': make('Байкал', 'Черновик.', is_published=False),
+        'future': make(
+            'Байкал', 'Отложенный пост.',
+            pub_date=timezone.now() + timedelta(days=1)),
+    }
+
+
+def get_page(client, query, **params):
+    response = client.get('/search/', {'q': query, **params})
+    assert response.status_code == 200
+    return response.context['page_obj']
+
+
+def search(client, query, **params):
+    return list(get_page(client, query, **params))
+
+
+def test_search_ranked_and_visible(client, posts):
+    found = search(client, 'байкал')
+    assert found == [posts['title'], posts['text']], (
+        'Убедитесь, что поиск находит только опубликованные посты,'
+        ' а совпадение в заголовке ставит выше совпадения в тексте.'
+    )
+    assert search(client, 'байк') == found, (
+        'Убедитесь, что поиск находит слова по их началу.'
+    )
+    assert search(client, '') == []
+
+
+def test_search_index_follows_changes(client, posts):
+    post = posts['other']
+    post.title = 'Пирог на Байкале'
+    post.save()
+    assert post in search(client, 'байкал')
+    Post.objects.filter(pk=post.pk).update(text='Без совпадений')
+    post.delete()
+    assert post not in search(client, 'пирог')
+
+
+def test_search_cursor_pagination(client, posts, mixer, user):
+    for post in posts.values():
+        post.delete()
+    for number in range(12):
+        mixer.blend(
+            'blog.Post', author=user, category=posts['title'].category,
+            is_published=True, pub_date=timezone.now() - timedelta(days=1),
+            title=f'Байкал {number}', text='Текст')
+    first = get_page(client, 'байкал')
+    second = search(client, 'байкал', after=first.next_cursor)
+    assert len(first) == 10 and len(second) == 2
+    assert not set(first) & set(second), (
+        'Убедитесь, что результаты поиска разбиты на страницы по курсору.'
+    )
+
+
+def test_query_syntax_is_escaped(client, posts):
+    assert search(client, 'байкал" OR NEAR(*') == [], (
+        'Убедитесь, что операторы FTS5 из запроса не выполняются.'
+    )
+
+
+def test_rebuild_search_index(user_client, posts):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO blog_post_search(blog_post_search)"
+            " VALUES ('delete-all')")
+    assert search(user_client, 'байкал') == []
+    call_command('rebuild_search_index')
+    assert search(user_client, 'байкал') == [posts['title'], posts['text']]
+    assert get_backend().ordering[-1] == 'pk'
@@ -0,0 +1,84 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload
+from django.utils import timezone
+from PIL import Image
+
+from blog.forms import PostForm
+from blog.models import Post
+from blog.uploads import LimitedUploadHandler
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_png(size):
+    buffer = BytesIO()
+    Image.new('L', size).save(buffer, 'PNG')
+    return SimpleUploadedFile('upload.png', buffer.getvalue())
+
+
+def get_form(published_category, image):
+    return PostForm(
+        data={
+            'title': 'Заголовок',
+            'text': 'Текст',
+            'pub_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+            'category': published_category.pk,
+        },
+        files={'image': image},
+    )
+
+
+def test_image_within_limits(published_category):
+    form = get_form(published_category, make_png((100, 50)))
+    assert form.is_valid(), form.errors
+
+
+@pytest.mark.parametrize('size', [(9000, 1), (7000, 7000)])
+def test_image_dimensions_limited(published_category, size):
+    form = get_form(published_category, make_png(size))
+    assert not form.is_valid()
+    assert form.errors.as_data()['image'][0].code == 'image_too_large', (
+        'Убедитесь, что изображения больше допустимых размеров'
+        ' отклоняются по заголовку файла.'
+    )
+
+
+def test_oversized_upload_not_stored(
+        settings, user_client, published_category):
+    settings.IMAGE_UPLOAD = {**settings.IMAGE_UPLOAD, 'MAX_SIZE': 1024}
+    image = make_png((100, 50))
+    image.name = 'large.png'
+    image.file.seek(0, 2)
+    image.file.write(b'\0' * 4096)
+    image.file.seek(0)
+    response = user_client.post('/posts/create/', {
+        'title': 'Заголовок',
+        'text': 'Текст',
+        'pub_date': timezone.now().strftime('%Y-%m-%dT%H:%M'),
+        'category': published_category.pk,
+        'image': image,
+    })
+    assert response.status_code == 200 and not Post.objects.exists(), (
+        'Убедитесь, что слишком большой файл не принимается формой.'
+    )
+    error = response.context['form'].errors.as_data()['image'][0]
+    assert error.code == 'file_too_large'
+
+
+def test_oversized_upload_stops_reading(settings, rf):
+    settings.IMAGE_UPLOAD = {**settings.IMAGE_UPLOAD, 'MAX_SIZE': 1024}
+    request = rf.post('/posts/create/')
+    handler = LimitedUploadHandler(request)
+    handler.new_file('image', 'large.png', 'image/png', 4096)
+    handler.receive_data_chunk(b'\0' * 1024, 0)
+    with pytest.raises(StopUpload) as stop:
+        handler.receive_data_chunk(b'\0' * 1024, 1024)
+    assert stop.value.connection_reset, (
+        'Убедитесь, что загрузка сверх лимита прерывается,'
+        ' не дочитывая тело запроса.'
+    )
+    assert request.oversized_uploads == {'image'}
+    handler.file.close()
@@ -0,0 +1,37 @@
+import pytest
+from django.template import engines
+
+from blog.warmup import warm_up_templates
+
+
+@pytest.fixture
+def cached_templates(settings):
+    template_settings = settings.TEMPLATES[0]
+    settings.TEMPLATES = [{
+        **template_settings,
+        'OPTIONS': {
+            **template_settings['OPTIONS'],
+            'loaders': [(
+                'django.template.loaders.cached.Loader',
+                settings.TEMPLATE_LOADERS,
+            )],
+        },
+    }]
+    return engines['django'].engine
+
+
+def test_templates_warmed_up(cached_templates, settings):
+    count = warm_up_templates()
+    assert count == len(list(settings.TEMPLATES_DIR.rglob('*.html')))
+    loader = cached_templates.template_loaders[0]
+    assert 'includes/post_card.html' in loader.get_template_cache, (
+        'Убедитесь, что при прогреве шаблоны попадают'
+        ' в кэширующий загрузчик.'
+    )
+
+
+def test_no_warm_up_without_cache(settings):
+    assert warm_up_templates() == 0, (
+        'Убедитесь, что без кэширующего загрузчика шаблоны'
+        ' не компилируются заранее.'
+    )